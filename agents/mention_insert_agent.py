@@ -1,10 +1,9 @@
-from langchain_openai import ChatOpenAI
 from langchain.agents import Tool, AgentExecutor, create_openai_functions_agent
 from langchain_core.prompts import PromptTemplate
 from tools.mention_insert_tool import insert_mention
-from config import LLM_MODEL
+from utils.openai_clients import get_chat_model
 
-llm = ChatOpenAI(model=LLM_MODEL, temperature=0)
+llm = get_chat_model(priority="batch", stage="mention_insert_agent")
 
 def load_prompt(path):
     with open(path, "r") as f:
@@ -1,10 +1,9 @@
 from langchain.agents import Tool, AgentExecutor, create_openai_functions_agent
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from tools.retrieve_mentions_tool import retrieve_mentions
-from config import LLM_MODEL
+from utils.openai_clients import get_chat_model
 
-llm = ChatOpenAI(model=LLM_MODEL, temperature=0)
+llm = get_chat_model(priority="interactive", stage="retrieval_agent")
 
 tools = [retrieve_mentions]
 
@@ -1,29 +1,50 @@
 from typing import Optional
+from contextlib import asynccontextmanager
 from requests import Session
 from sqlalchemy import text
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse, Response
 
 from models.companies import Company
-from tools.retrieve_mentions_tool import retrieve_mentions
+from tools.retrieve_mentions_tool import aretrieve_mentions
 
-from services.rag.chat import get_rag_response, get_memory
-from services.db_setup import engine
-from services.companies import get_company_status, set_company_status
+from services.rag.chat import get_rag_response, stream_rag_response, get_memory
+from services.rag.retriever_cache import vectorstore_cache
+from services.db_setup import get_async_engine
+from services.companies import aget_company_status, set_company_status
+from services.analytics import get_rollup
+from services.job_queue import enqueue_job, get_job, list_jobs, cancel_job
+from services.pipeline import PIPELINE_STAGES
+from services.pipeline_worker import start_workers, stop_workers
+from services.pipeline_runs import list_runs
+from utils.metrics import HTTP_REQUEST_DURATION, clear_stale_metrics, render_metrics
 
 from schemas.chat_input import ChatInput
 from schemas.script_run_request import ScriptRunRequest
 
 from config import DB_CONNECTION_URL
 
-import subprocess
+import asyncio
 import os
+import aiofiles
+import json
 import time
 
-from config import DB_CONNECTION_URL
-app = FastAPI()
+from config import PIPELINE_WORKERS
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Drop metric files of processes from earlier runs before new workers start writing theirs
+    clear_stale_metrics()
+    # Warm pipeline workers live as long as the API and drain the job queue
+    workers = start_workers(PIPELINE_WORKERS)
+    yield
+    # Let running jobs reach a stage boundary and requeue themselves, without blocking the event loop
+    await asyncio.to_thread(stop_workers, workers)
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,142 +54,177 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - start)
+
+@app.get("/metrics")
+async def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 @app.get("/")
-def index():
+async def index():
     return {"message": "Company Review API is running 🚀"}
 
 @app.get("/mentions")
-def get_mentions(
+async def get_mentions(
     company: str = Query(...),
     type: Optional[str] = Query(None),
     sentiment: Optional[str] = Query(None),
     keyword: Optional[str] = Query(None),
     limit: int = Query(10)
 ):
-    input_data = {"company": company, "limit": limit}
-    if type is not None:
-        input_data["type"] = type
-    if sentiment is not None:
-        input_data["sentiment"] = sentiment
-    if keyword is not None:
-        input_data["keyword"] = keyword
-
-    return retrieve_mentions.invoke(input_data)
+    return await aretrieve_mentions(
+        company=company,
+        type=type,
+        sentiment=sentiment,
+        keyword=keyword,
+        limit=limit
+    )
 
 @app.get("/sentiment-breakdown")
-def sentiment_breakdown(company: str):
-    query = """
-        SELECT sentiment, COUNT(*) as count
-        FROM mentions
-        WHERE company = :company
-        GROUP BY sentiment
-        ORDER BY count DESC
-    """
-    with engine.connect() as conn:
-        result = conn.execute(text(query), {"company": company}).fetchall()
-        return [{"sentiment": row[0], "count": row[1]} for row in result]
+async def sentiment_breakdown(company: str):
+    return [{"sentiment": value, "count": count} for value, count in await get_rollup(company, "sentiment")]
     
 @app.get("/mention-types")
-def mention_type_breakdown(company: str):
-    query = """
-        SELECT type, COUNT(*) as count
-        FROM mentions
-        WHERE company = :company
-        GROUP BY type
-        ORDER BY count DESC
-    """
-    with engine.connect() as conn:
-        result = conn.execute(text(query), {"company": company}).fetchall()
-        return [{"type": row[0], "count": row[1]} for row in result]
+async def mention_type_breakdown(company: str):
+    return [{"type": value, "count": count} for value, count in await get_rollup(company, "type")]
     
 @app.post("/chat")
-def chat_with_rag(input: ChatInput):
-    answer = get_rag_response(
+async def chat_with_rag(input: ChatInput):
+    answer = await get_rag_response(
         company=input.company,
         query=input.query,
         session_id=input.session_id
     )
     return {"answer": answer}
 
+@app.post("/chat/stream")
+async def chat_with_rag_stream(input: ChatInput):
+    """Server-Sent Events: one `data` event per token, then `done` with the full answer."""
+    async def events():
+        tokens = []
+        try:
+            async for token in stream_rag_response(
+                company=input.company,
+                query=input.query,
+                session_id=input.session_id
+            ):
+                tokens.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        yield f"event: done\ndata: {json.dumps({'answer': ''.join(tokens)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/chat/retriever-cache")
+async def get_retriever_cache_stats():
+    return vectorstore_cache.stats()
+
 @app.get("/chat/history")
-def get_chat_history(company: str = Query(...), session_id: str = Query(...)):
-    history = get_memory(session_id=session_id, company=company)
+async def get_chat_history(company: str = Query(...), session_id: str = Query(...)):
+    history = await get_memory(session_id=session_id, company=company)
     return {"history": [{"role": r, "message": m} for r, m in history]}
 
 @app.get("/keywords-breakdown")
-def keywords_breakdown(company: str):
-    query = """
-        SELECT keywords
-        FROM mentions
-        WHERE company = :company
-    """
-    with engine.connect() as conn:
-        result = conn.execute(text(query), {"company": company}).fetchall()
-        keywords = []
-        for row in result:
-            keywords.extend(row[0] if isinstance(row[0], list) else [])
-        from collections import Counter
-        counter = Counter(keywords)
-        return [{"keyword": k, "count": v} for k, v in counter.most_common()]
+async def keywords_breakdown(company: str):
+    return [{"keyword": value, "count": count} for value, count in await get_rollup(company, "keyword")]
 
 @app.get("/companies")
-def get_companies():
+async def get_companies():
     query = """
         SELECT DISTINCT company FROM mentions
     """
-    with engine.connect() as conn:
-        result = conn.execute(text(query)).fetchall()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(text(query))).fetchall()
         return [row[0] for row in result]
     
 
 @app.post("/run-script")
-def run_company_script(request: ScriptRunRequest):
+async def run_company_script(request: ScriptRunRequest):
     try:
-        log_dir = "logs"
-        os.makedirs(log_dir, exist_ok=True)
-        filename = f"{request.company}_{int(time.time())}.log"
-        log_file = os.path.join(log_dir, f"{request.company}_{int(time.time())}.log")
-
-        command = ["python", "main.py", request.company, f"--limit={request.limit}", f"--log-file={filename}"]
-        if request.all_steps:
-            command.append("--all")
-
-        with open(log_file, "w") as f:
-            process = subprocess.Popen(command, stdout=f, stderr=subprocess.STDOUT, text=True)
+        options = {
+            "limit": request.limit,
+            "stages": list(PIPELINE_STAGES) if request.all_steps else [],
+        }
+        job, created = await asyncio.to_thread(enqueue_job, request.company, options)
 
         return {
-            "command": " ".join(command),
-            "message": f"Script for '{request.company}' started successfully.",
-            "pid": process.pid,
-            "log_file": log_file,
+            "job_id": job["id"],
+            "status": job["status"],
+            "message": (
+                f"Script for '{request.company}' queued successfully."
+                if created else f"A run for '{request.company}' is already {job['status']}."
+            ),
+            "log_file": os.path.join("logs", job["log_file"]),
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs")
+async def get_jobs(company: Optional[str] = Query(None), limit: int = Query(50)):
+    return await asyncio.to_thread(list_jobs, company, limit)
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: int):
+    job = await asyncio.to_thread(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/pipeline-runs")
+async def get_pipeline_runs(company: Optional[str] = Query(None), limit: int = Query(50)):
+    return await asyncio.to_thread(list_runs, company, limit)
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_pipeline_job(job_id: int):
+    job = await asyncio.to_thread(cancel_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
     
 @app.get("/logs/{logfile}")
-def get_log_file(logfile: str):
+async def get_log_file(logfile: str):
     log_path = os.path.join("logs", logfile)
     if not os.path.isfile(log_path):
         raise HTTPException(status_code=404, detail="Log file not found")
-    with open(log_path, "r") as f:
-        log_content = f.read()
+    async with aiofiles.open(log_path, "r") as f:
+        log_content = await f.read()
     return PlainTextResponse(content=log_content)
 
 @app.get("/company/status")
-def check_status(company: str):
-    return {"status": get_company_status(company)}
+async def check_status(company: str):
+    return {"status": await aget_company_status(company)}
 
 @app.get("/chat/all-history")
-def get_all_chat_histories(company: str = Query(...)):
+async def get_all_chat_histories(company: str = Query(...)):
     query = """
         SELECT session_id, role, message, timestamp
         FROM chat_sessions
         WHERE company = :company
         ORDER BY session_id, timestamp
     """
-    with engine.connect() as conn:
-        result = conn.execute(text(query), {"company": company}).fetchall()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(text(query), {"company": company})).fetchall()
 
     from collections import defaultdict
     grouped = defaultdict(list)
@@ -182,7 +238,7 @@ def get_all_chat_histories(company: str = Query(...)):
     return {"histories": dict(grouped)}
 
 @app.get("/chat/recent-questions")
-def get_recent_questions(company: str = Query(...), limit: int = Query(10)):
+async def get_recent_questions(company: str = Query(...), limit: int = Query(10)):
     query = """
         SELECT DISTINCT ON (message) message, timestamp
         FROM chat_sessions
@@ -190,22 +246,22 @@ def get_recent_questions(company: str = Query(...), limit: int = Query(10)):
         ORDER BY message, timestamp DESC
         LIMIT :limit
     """
-    with engine.connect() as conn:
-        result = conn.execute(text(query), {"company": company, "limit": limit}).fetchall()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(text(query), {"company": company, "limit": limit})).fetchall()
         return {"questions": [row[0] for row in result]}
 
 
 # New route to fetch active processes from the backend
 @app.get("/companies/active-processes")
-def get_active_processes():
+async def get_active_processes():
     query = """
         SELECT name, status, updated_at, log_file
         FROM companies
-        WHERE status NOT IN ('Completed', 'Failed')
+        WHERE status NOT IN ('Completed', 'Failed', 'Cancelled')
         ORDER BY updated_at DESC
     """
-    with engine.connect() as conn:
-        result = conn.execute(text(query)).fetchall()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(text(query))).fetchall()
         return [
             {
                 "company": row[0],
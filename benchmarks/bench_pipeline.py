@@ -0,0 +1,181 @@
+# benchmarks/bench_pipeline.py
+#
+# End-to-end pipeline benchmark against local stand-ins: a fake Reddit API,
+# FakeChatModel, FakeEmbeddings and a local Postgres. Writes items/sec, wall
+# time and peak memory per stage to a JSON file for comparing commits:
+#   python -m benchmarks.bench_pipeline --db-url postgresql://localhost/varys_bench --posts-per-sub 200
+#
+# The schema relies on Postgres (JSONB, generated columns, triggers), so the
+# database must be Postgres; it has to be local unless --allow-remote-db is set.
+
+import argparse
+import gc
+import json
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+LOCAL_HOSTS = {None, "", "localhost", "127.0.0.1", "::1"}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def count_records(folder, stem):
+    from utils.io import find_record_file, iter_records
+    path = find_record_file(folder, stem)
+    return sum(1 for _ in iter_records(path)) if path else 0
+
+
+def reset_company(company):
+    """Removes everything a previous benchmark run left for `company`."""
+    from sqlalchemy import text
+    from services.db_setup import engine
+    from services.rag.retriever_cache import get_vectorstore_path
+
+    for folder, stem in (("data/raw", f"reddit_{company}"), ("data/processed", f"reddit_mentions_{company}"),
+                         ("data/processed", f"enriched_mentions_{company}")):
+        for ext in (".jsonl", ".jsonl.gz", ".json"):
+            if os.path.exists(os.path.join(folder, stem + ext)):
+                os.remove(os.path.join(folder, stem + ext))
+    for path in (f"data/raw/reddit_{company}.watermarks.json",
+                 f"data/processed/enriched_mentions_{company}.checkpoint.jsonl"):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(get_vectorstore_path(company), ignore_errors=True)
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM mentions WHERE company = :company"), {"company": company})
+
+
+def measure(name, fn, count):
+    """Runs one stage and returns its timing, item count and peak traced memory."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    items = count(result)
+    print(f"⏱️ {name}: {items} items in {seconds:.2f}s")
+    return {
+        "stage": name,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_sec": round(items / seconds, 2) if seconds else None,
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--company", default="BenchCorp")
+    parser.add_argument("--other-companies", type=int, default=3, help="Companies sharing the corpus as noise")
+    parser.add_argument("--posts-per-sub", type=int, default=100)
+    parser.add_argument("--comments-per-post", type=int, default=10)
+    parser.add_argument("--reddit-latency", type=float, default=0.01, help="Seconds per fake Reddit request")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per fake embeddings request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--engine", choices=["multi-step", "structured"], default="multi-step")
+    parser.add_argument("--streaming", action="store_true", help="Run preprocess → populate → embed through the streaming executor")
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DB_URL"), help="Local Postgres URL (defaults to BENCH_DB_URL)")
+    parser.add_argument("--allow-remote-db", action="store_true")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/pipeline-<commit>.json)")
+    args = parser.parse_args()
+
+    if not args.db_url:
+        parser.error("--db-url (or BENCH_DB_URL) is required")
+    from sqlalchemy.engine import make_url
+    if make_url(args.db_url).host not in LOCAL_HOSTS and not args.allow_remote_db:
+        parser.error("refusing to benchmark against a non-local database without --allow-remote-db")
+    # config reads the URL at import time, so it must be set before any service is imported
+    os.environ["DB_CONNECTION_URL"] = args.db_url
+
+    from benchmarks.fake_embeddings import FakeEmbeddings
+    from benchmarks.fake_llm import FakeChatModel
+    from benchmarks.fake_reddit import FakeReddit, FakeRedditCorpus
+    from scrapers.raw_store import RawPostStore
+    from scrapers.reddit_scraper import RedditScraper
+    from scrapers.run_scraping import run_scraping_for_company
+    from services.db_setup import setup_tables
+    from services.embed_mentions_from_db import build_vectorstore_from_db
+    from services.populate_mentions import populate_mentions_bulk
+    from services.preprocess_mentions import preprocess_mentions
+    from services.run_pipeline import run_info_gathering
+    from services.streaming_pipeline import stream_mentions
+    from utils.rate_limiter import RateLimiter
+
+    setup_tables()
+    reset_company(args.company)
+
+    companies = [args.company] + [f"OtherCo{i}" for i in range(args.other_companies)]
+    corpus = FakeRedditCorpus(companies, args.posts_per_sub, args.comments_per_post)
+    store = RawPostStore(os.path.join(tempfile.mkdtemp(), "reddit_store.sqlite"))
+    scraper = RedditScraper(reddit_factory=lambda: FakeReddit(corpus, args.reddit_latency),
+                            concurrency=args.concurrency, store=store)
+    chat_model = FakeChatModel(latency=args.llm_latency)
+    embeddings = FakeEmbeddings(latency=args.embed_latency)
+    limiter = RateLimiter(0, 0)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    stages = [
+        measure("scrape", lambda: run_scraping_for_company(args.company, limit=args.posts_per_sub, incremental=False, reddit_scraper=scraper),
+                lambda _: count_records("data/raw", f"reddit_{args.company}")),
+        measure("gather", lambda: run_info_gathering(args.company, store=store),
+                lambda _: count_records("data/processed", f"reddit_mentions_{args.company}")),
+    ]
+    if args.streaming:
+        stages.append(measure(
+            "stream",
+            lambda: stream_mentions(args.company, concurrency=args.concurrency, resume=False, use_cache=False, engine=args.engine,
+                                    full_embed=True, chat_model=chat_model, rate_limiter=limiter, embeddings=embeddings),
+            lambda stats: stats["preprocess"]["items_out"],
+        ))
+    else:
+        stages += [
+            measure("preprocess", lambda: preprocess_mentions(args.company, concurrency=args.concurrency, chat_model=chat_model,
+                                                              rate_limiter=limiter, resume=False, use_cache=False, engine=args.engine),
+                    lambda _: count_records("data/processed", f"enriched_mentions_{args.company}")),
+            measure("populate", lambda: populate_mentions_bulk(args.company), lambda inserted: inserted),
+            measure("embed", lambda: build_vectorstore_from_db(args.company, incremental=False, embeddings=embeddings),
+                    lambda documents: documents),
+        ]
+    total = time.perf_counter() - start
+    tracemalloc.stop()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("db_url", "output")},
+        "corpus_posts": sum(len(posts) for posts in corpus.posts.values()),
+        "reddit_requests": corpus.requests,
+        "llm_calls": chat_model.calls,
+        "embedding_calls": embeddings.calls,
+        "total_seconds": round(total, 3),
+        # ru_maxrss is in kilobytes on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": stages,
+    }
+
+    output = args.output or os.path.join("benchmarks", "results", f"pipeline-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"✅ Wrote benchmark results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/bench_preprocess.py
+#
+# Measures preprocessing throughput against FakeChatModel, offline:
+#   python -m benchmarks.bench_preprocess --mentions 200 --latency 0.2 --concurrency 16
+
+import argparse
+import json
+import time
+
+from benchmarks.fake_llm import FakeChatModel
+from services.preprocess_mentions import preprocess_mentions
+from utils.io import record_path, write_records
+from utils.rate_limiter import RateLimiter
+
+
+def write_synthetic_mentions(company: str, count: int):
+    mentions = (
+        {
+            "source": "Reddit",
+            "text": f"Mention {i}: working at {company} was\n\ngreat, salary dherai ramro thiyo.",
+            "type": "comment" if i % 3 else "post",
+        }
+        for i in range(count)
+    )
+    write_records(mentions, record_path("data/processed", f"reddit_mentions_{company}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline preprocessing throughput benchmark")
+    parser.add_argument("--company", default="BenchCorp")
+    parser.add_argument("--mentions", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per fake LLM call")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls that fail with 429")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--engine", choices=["multi-step", "structured"], default="multi-step")
+    parser.add_argument("--rpm", type=int, default=0)
+    parser.add_argument("--tpm", type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_mentions(args.company, args.mentions)
+
+    model = FakeChatModel(latency=args.latency, rate_limit_rate=args.rate_limit_rate)
+    limiter = RateLimiter(args.rpm, args.tpm)
+
+    start = time.perf_counter()
+    preprocess_mentions(args.company, concurrency=args.concurrency, chat_model=model, rate_limiter=limiter, use_cache=False, engine=args.engine)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mentions": args.mentions,
+        "concurrency": args.concurrency,
+        "engine": args.engine,
+        "llm_calls": model.calls,
+        "seconds": round(elapsed, 3),
+        "mentions_per_sec": round(args.mentions / elapsed, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
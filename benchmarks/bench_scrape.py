@@ -0,0 +1,55 @@
+# benchmarks/bench_scrape.py
+#
+# Measures RedditScraper wall time per company against a fake Reddit API, offline:
+#   python -m benchmarks.bench_scrape --companies Cedargate Leapfrog --latency 0.1 --concurrency 8
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fake_reddit import FakeReddit, FakeRedditCorpus
+from scrapers.raw_store import RawPostStore
+from scrapers.reddit_scraper import RedditScraper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Reddit scraping benchmark")
+    parser.add_argument("--companies", nargs="+", default=["Cedargate", "Leapfrog", "F1Soft"])
+    parser.add_argument("--posts-per-sub", type=int, default=100)
+    parser.add_argument("--comments-per-post", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake API request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = FakeRedditCorpus(args.companies, args.posts_per_sub, args.comments_per_post)
+    # A fresh raw store, so comment trees shared between companies are fetched once per run
+    store = RawPostStore(os.path.join(tempfile.mkdtemp(), "reddit_store.sqlite"))
+    scraper = RedditScraper(
+        reddit_factory=lambda: FakeReddit(corpus, args.latency), concurrency=args.concurrency, store=store
+    )
+
+    report = []
+    for company in args.companies:
+        requests_before = corpus.requests
+        start = time.perf_counter()
+        results = scraper.scrape(company=company, limit=args.limit)
+        report.append({
+            "company": company,
+            "results": len(results),
+            "requests": corpus.requests - requests_before,
+            "seconds": round(time.perf_counter() - start, 3),
+        })
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "latency": args.latency,
+        "companies": report,
+        "raw_store": store.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_vector_index.py
+#
+# Compares the FAISS index types the vector stores can use against the exact
+# Flat index, on synthetic clustered unit vectors shaped like ada-002
+# embeddings. Reports recall@k, single-query latency, index size and the
+# private memory each memory-mapped index costs a process:
+#   python -m benchmarks.bench_vector_index --docs 50000 --queries 200
+#
+# No database or API access is needed.
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.bench_pipeline import git_commit
+
+CONFIGS = (
+    ("flat", "none"),
+    ("hnsw", "none"),
+    ("hnsw", "fp16"),
+    ("ivf", "none"),
+    ("ivf", "fp16"),
+    ("ivf", "pq"),
+)
+
+
+def synthetic_vectors(count, dimension, clusters, noise, rng):
+    """Unit vectors scattered around `clusters` random topics, like embeddings of related texts."""
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + noise * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def private_memory_mb():
+    """Anonymous (non file-backed) resident memory, which mapped index pages don't count towards. Linux only."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def bench_config(index_type, compression, vectors, queries, truth, k, folder):
+    import faiss
+    from services.rag.vector_index import build_index, describe_index, read_index
+
+    start = time.perf_counter()
+    index = build_index(vectors, index_type, compression)
+    build_seconds = time.perf_counter() - start
+    actual = describe_index(index)
+    path = os.path.join(folder, f"{index_type}-{compression}.faiss")
+    faiss.write_index(index, path)
+    del index
+
+    memory_before = private_memory_mb()
+    index = read_index(path, mmap=True)
+    latencies = []
+    found = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found += len(set(ids[0]) & set(expected))
+    memory_after = private_memory_mb()
+
+    latencies_ms = np.array(latencies) * 1000
+    result = {
+        "index_type": actual[0],
+        "compression": actual[1],
+        f"recall_at_{k}": round(found / (len(queries) * k), 4),
+        "query_p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "build_seconds": round(build_seconds, 2),
+        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+        "private_memory_mb": round(memory_after - memory_before, 1) if memory_before is not None else None,
+    }
+    print(f"⏱️ {actual[0]}/{actual[1]}: recall@{k} {result[f'recall_at_{k}']:.3f}, p50 {result['query_p50_ms']}ms, {result['file_mb']} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS index type benchmark: recall and latency against Flat")
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=1536, help="ada-002 embeddings have 1536 dimensions")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5, help="Spread around each topic; 0.5 gives ~0.8 cosine within a topic")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, help="IVF lists probed per query (defaults to FAISS_NPROBE)")
+    parser.add_argument("--ef-search", type=int, help="HNSW search list size (defaults to FAISS_HNSW_EF_SEARCH)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/vector_index-<commit>.json)")
+    args = parser.parse_args()
+
+    # config reads these at import time, so they must be set before the index module is imported
+    if args.nprobe:
+        os.environ["FAISS_NPROBE"] = str(args.nprobe)
+    if args.ef_search:
+        os.environ["FAISS_HNSW_EF_SEARCH"] = str(args.ef_search)
+    import faiss
+
+    rng = np.random.default_rng(args.seed)
+    vectors = synthetic_vectors(args.docs, args.dimension, args.clusters, args.noise, rng)
+    # Queries are perturbed copies of stored vectors, as a question lands near the mentions answering it
+    queries = vectors[rng.integers(0, args.docs, args.queries)] + args.noise * rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = faiss.IndexFlatL2(args.dimension)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+    del exact
+
+    with tempfile.TemporaryDirectory() as folder:
+        results = [bench_config(index_type, compression, vectors, queries, truth, args.k, folder) for index_type, compression in CONFIGS]
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "faiss_version": faiss.__version__,
+        "results": results,
+    }
+
+    output = args.output or os.path.join("benchmarks", "results", f"vector_index-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"✅ Wrote benchmark results to {output}")
+
+
+if __name__ == "__main__":
+    main()
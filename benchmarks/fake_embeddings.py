@@ -0,0 +1,34 @@
+# benchmarks/fake_embeddings.py
+
+import hashlib
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Offline stand-in for OpenAIEmbeddings. Vectors are derived from a hash of
+    the text, so identical texts embed identically; each call sleeps `latency`
+    seconds, like one request to the embeddings API.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
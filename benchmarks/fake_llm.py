@@ -0,0 +1,81 @@
+# benchmarks/fake_llm.py
+
+import json
+import random
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+def fake_completion(prompt: str) -> str:
+    """Canned answers for the prompts in prompts/*.txt, keyed on their trailing cue."""
+    tail = prompt.rstrip()
+    if "Do all of the following in one pass" in prompt:
+        text = " ".join(prompt.rsplit("Text:", 1)[1].split())
+        return json.dumps({
+            "translated": text,
+            "type": random.choice(["question", "opinion", "complaint", "praise", "other"]),
+            "sentiment": random.choice(["positive", "neutral", "negative"]),
+            "keywords": ["salary", "work culture", "growth"],
+        })
+    if tail.endswith("Sentiment:") or tail.endswith("**Sentiment**: neutral"):
+        return random.choice(["positive", "neutral", "negative"])
+    if tail.endswith("Keywords:"):
+        return "salary, work culture, growth"
+    if tail.endswith("Type:"):
+        return random.choice(["question", "opinion", "complaint", "praise", "other"])
+    if tail.endswith("Processed Text:"):
+        match = re.search(r"Input: (.*)\nProcessed Text:", prompt, re.S)
+        return " ".join(match.group(1).split()) if match else ""
+    if tail.endswith("Output:"):
+        match = re.search(r"Review: (.*)\s+Company: (.*?)\s+Output:$", tail, re.S)
+        if not match:
+            return '""'
+        review, company = match.group(1), match.group(2).lower()
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", review) if company in s.lower()]
+        return " ".join(sentences) or '""'
+    if "Now translate this:" in prompt:
+        return prompt.split("Now translate this:", 1)[1].strip()
+    return "ok"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatOpenAI. Sleeps `latency` seconds per call and fails
+    with a 429 at `rate_limit_rate`, so throughput and retry behaviour can be
+    measured without network access.
+    """
+
+    latency: float = 0.0
+    rate_limit_rate: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_rate and random.random() < self.rate_limit_rate:
+            raise FakeRateLimitError("429 Too Many Requests")
+
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = fake_completion(prompt)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
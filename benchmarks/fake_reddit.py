@@ -0,0 +1,137 @@
+# benchmarks/fake_reddit.py
+
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeComments:
+    def __init__(self, submission_id, bodies, corpus, latency):
+        self._submission_id = submission_id
+        self._bodies = bodies
+        self._corpus = corpus
+        self._latency = latency
+
+    def replace_more(self, limit=0):
+        # The comment tree is fetched on first use, one request per submission
+        self._corpus.record_request()
+        time.sleep(self._latency)
+        return []
+
+    def list(self):
+        return [
+            SimpleNamespace(id=f"{self._submission_id}c{i}", body=body)
+            for i, body in enumerate(self._bodies)
+        ]
+
+
+class FakeSubmission:
+    def __init__(self, submission_id, sub, title, selftext, comments, created_utc, corpus, latency):
+        self.id = submission_id
+        self.title = title
+        self.selftext = selftext
+        self.created_utc = created_utc
+        self.permalink = f"/r/{sub}/comments/{submission_id}/"
+        self.comments = FakeComments(submission_id, comments, corpus, latency)
+
+
+class FakeRedditCorpus:
+    """
+    Synthetic posts shared by every FakeReddit client, with a rate-limit window
+    like Reddit's (`requests_per_window` per `window` seconds).
+    """
+
+    def __init__(self, companies, posts_per_sub=50, comments_per_post=10, subs=None,
+                 crosspost_rate=0.1, requests_per_window=600, window=600.0, seed=42):
+        rng = random.Random(seed)
+        subs = subs or ["technepal", "Nepal", "NepalJobs", "careerguidance", "ITCareerQuestions"]
+        self.posts = {sub: [] for sub in subs}
+        now = time.time()
+
+        for sub in subs:
+            for i in range(posts_per_sub):
+                company = rng.choice(companies)
+                if self.posts[sub] and rng.random() < crosspost_rate:
+                    # Same submission surfacing in another subreddit
+                    other = rng.choice([s for s in subs if self.posts[s]] or [sub])
+                    self.posts[sub].append(rng.choice(self.posts[other]))
+                    continue
+                comments = [
+                    f"{rng.choice(companies)} {rng.choice(['salary is good', 'work life balance is bad', 'interview was easy', 'great team'])} #{j}"
+                    for j in range(comments_per_post)
+                ]
+                self.posts[sub].append({
+                    "id": f"{sub}_{i}",
+                    "title": f"Working at {company} review {i}",
+                    "selftext": f"My experience at {company}: {rng.choice(['positive', 'mixed', 'negative'])}.",
+                    "comments": comments,
+                    "created_utc": now - rng.randint(0, 365 * 86400),
+                })
+
+        self.requests_per_window = requests_per_window
+        self.window = window
+        self.window_start = time.time()
+        self.used = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start, self.used = now, 0
+            self.used += 1
+            self.requests += 1
+            if self.used > self.requests_per_window:
+                raise RuntimeError("429 Too Many Requests")
+
+    def limits(self):
+        with self._lock:
+            return {
+                "remaining": self.requests_per_window - self.used,
+                "reset_timestamp": self.window_start + self.window,
+                "used": self.used,
+            }
+
+
+class FakeSubreddit:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def search(self, query, sort="new", limit=10):
+        corpus = self.client.corpus
+        corpus.record_request()
+        time.sleep(self.client.latency)
+        company = query.split(" (")[0].lower()
+        matches = [
+            p for p in corpus.posts.get(self.name, [])
+            if company in f"{p['title']} {p['selftext']}".lower() or any(company in c.lower() for c in p["comments"])
+        ]
+        matches.sort(key=lambda p: p["created_utc"], reverse=True)
+        for post in matches[:limit]:
+            yield FakeSubmission(post["id"], self.name, post["title"], post["selftext"], post["comments"], post["created_utc"], corpus, self.client.latency)
+
+
+class FakeReddit:
+    """Drop-in for praw.Reddit covering what RedditScraper uses."""
+
+    def __init__(self, corpus: FakeRedditCorpus, latency: float = 0.05):
+        self.corpus = corpus
+        self.latency = latency
+
+    @property
+    def auth(self):
+        return SimpleNamespace(limits=self.corpus.limits())
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
+
+    def submission(self, id):
+        # Lazy like PRAW's: nothing is requested until its comments are loaded
+        for sub, posts in self.corpus.posts.items():
+            for post in posts:
+                if post["id"] == id:
+                    return FakeSubmission(post["id"], sub, post["title"], post["selftext"], post["comments"], post["created_utc"], self.corpus, self.latency)
+        raise KeyError(id)
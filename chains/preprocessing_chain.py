@@ -1,10 +1,25 @@
-from langchain_core.runnables import RunnableSequence, RunnableParallel, RunnableLambda
+from langchain_core.runnables import RunnableSequence, RunnableParallel, RunnableLambda, RunnableBranch, RunnablePassthrough
 from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
 from langchain_openai import ChatOpenAI
-from config import LLM_MODEL
+from schemas.enrichment import MentionEnrichment
+from utils.rate_limiter import llm_rate_limiter, with_rate_limit
+from utils.llm_cache import get_llm_cache, hash_text, with_cache
+from utils.metrics import with_llm_metrics, record_llm_calls_saved
+from utils.prefilter import prefilter_mention, needs_cleaning, relevance_route
+from config import LLM_MODEL, LLM_CACHE_ENABLED, ENRICHMENT_ENGINE, PREFILTER_ENABLED
 
 llm = ChatOpenAI(model=LLM_MODEL, temperature=0)
 
+ENRICHMENT_ENGINES = ("multi-step", "structured")
+# LLM calls each engine makes for one mention (before any fallback or pre-filter skips)
+LLM_CALLS_PER_MENTION = {"multi-step": 5, "structured": 1}
+# Marks a mention that only names the company in passing; it is checkpointed, so it isn't
+# retried, but left out of the enriched output rather than stored with a made-up sentiment
+PASSING_RESULT = {"low_relevance": True}
+
 def load_prompt(path):
     with open(path, "r") as f:
         return PromptTemplate.from_template(f.read())
@@ -16,40 +31,160 @@ sentiment_prompt = load_prompt("prompts/sentiment_prompt.txt")
 keywords_prompt = load_prompt("prompts/keywords_prompt.txt")
 focus_company_prompt = load_prompt("prompts/focus_company_prompt.txt")
 preprocess_prompt = load_prompt("prompts/preprocess_mentions_prompt.txt")
+enrich_prompt = load_prompt("prompts/enrich_mention_prompt.txt")
+
+enrichment_parser = PydanticOutputParser(pydantic_object=MentionEnrichment)
 
 # Helper to unwrap content from AIMessage
 unwrap = RunnableLambda(lambda msg: msg.content)
+# The focus prompt answers `""` when nothing is about the company
+unquote = RunnableLambda(lambda text: text.strip().strip('"').strip())
+
+def get_text(d):
+    return d["text"]
+
+def is_passing(d):
+    return relevance_route(d["relevance"], d["text"]) == "passing"
+
+def skip_llm(reason, calls=1, result=get_text):
+    """Stands in for LLM calls the pre-filter showed wouldn't change the output."""
+    def run(d):
+        record_llm_calls_saved(reason, calls)
+        return result(d)
+    return RunnableLambda(run, name=f"Skip{reason.title().replace('_', '')}")
+
+def with_prefilter_signals(company_name):
+    """Adds `language` and `relevance` to inputs gathered before the pre-filter existed."""
+    return RunnableLambda(lambda d: d if "language" in d and "relevance" in d else prefilter_mention(d, company_name))
 
-def get_preprocessing_chain(company_name):
-    preprocess_chain = preprocess_prompt | llm | unwrap
-    translate_chain = translate_prompt | llm | unwrap
-    # focused_company_prompt_chain = focus_company_prompt.partial(company_name=company_name) | llm | unwrap
-    
+def get_stage_builder(chat_model=None, rate_limiter=None, use_cache=LLM_CACHE_ENABLED):
+    """
+    Returns `stage(name, prompt)`, which builds `prompt | model | unwrap`.
+    `chat_model` overrides the default ChatOpenAI client (e.g. a local fake for
+    offline runs); every LLM call goes through `rate_limiter` and retries on 429s.
+    With `use_cache`, responses are served from the local LLM response cache
+    when the same prompt was seen before. Calls that reach the model record
+    latency and token usage per stage.
+    """
+    base_model = chat_model or llm
+    model_name = getattr(base_model, "model_name", type(base_model).__name__)
+    cache = get_llm_cache() if use_cache else None
+
+    def stage(name, prompt):
+        model = with_rate_limit(with_llm_metrics(base_model, name), rate_limiter or llm_rate_limiter)
+        if cache is None:
+            return prompt | model | unwrap
+        cache.prune_stale_templates(name, hash_text(prompt.template))
+        return prompt | with_cache(model, cache, name, prompt.template, model_name) | unwrap
+
+    return stage
+
+def get_preprocessing_chain(company_name, chat_model=None, rate_limiter=None, use_cache=LLM_CACHE_ENABLED, prefilter=PREFILTER_ENABLED):
+    """
+    Clean → translate → classify → sentiment + keywords, one LLM call each.
+    Outputs `sentiment`, `keywords`, `type` and `translated` (the English text
+    the later steps read, so the part about the company for focused mentions).
+    With `prefilter`, the local signals from `utils.prefilter` pick the calls
+    that change the output: already-clean text isn't cleaned, English isn't
+    translated, passing mentions are marked with `PASSING_RESULT` without any
+    call, and mentions only partly about the company are narrowed to those
+    parts first.
+    """
+    stage = get_stage_builder(chat_model, rate_limiter, use_cache)
+
+    preprocess_chain = stage("preprocess", preprocess_prompt)
+    translate_chain = stage("translate", translate_prompt)
+    focus_chain = stage("focus", focus_company_prompt.partial(company_name=company_name)) | unquote
 
     prepare_input = RunnableLambda(lambda translated: {
         "text": translated,
         "company_name": company_name
     })
 
+    classify_chain = stage("classify", classify_prompt)
     type_chain = RunnableLambda(lambda d: {
         **d,
-        "type": (classify_prompt | llm | unwrap).invoke(d)
+        "type": classify_chain.invoke(d).strip()
     })
 
-    # Step 3: Feed into sentiment + keywords
-    sentiment_chain = sentiment_prompt | llm | unwrap
-    keywords_chain = keywords_prompt | llm | unwrap
+    # Step 3: Feed into sentiment + keywords; the translation and type are kept in the output too
+    sentiment_chain = stage("sentiment", sentiment_prompt)
+    keywords_chain = stage("keywords", keywords_prompt)
 
     postprocess_chain = type_chain | RunnableParallel({
         "sentiment": sentiment_chain,
-        "keywords": keywords_chain
+        "keywords": keywords_chain,
+        "type": RunnableLambda(lambda d: d["type"]),
+        "translated": get_text,
     })
 
-    full_chain = RunnableSequence(
-        preprocess_chain,
-        translate_chain,
-        prepare_input,
-        postprocess_chain
+    if not prefilter:
+        return RunnableSequence(
+            preprocess_chain,
+            translate_chain,
+            prepare_input,
+            postprocess_chain
+        )
+
+    clean = RunnableBranch((lambda d: needs_cleaning(d["text"]), preprocess_chain), skip_llm("already_clean"))
+    focus = RunnableBranch((lambda d: relevance_route(d["relevance"], d["text"]) == "focus", focus_chain), get_text)
+    translate = RunnableBranch((lambda d: d["language"] != "en", translate_chain), skip_llm("english"))
+
+    enrich = RunnablePassthrough.assign(text=translate) | get_text | prepare_input | postprocess_chain
+    # Focusing can find nothing about the company, which leaves the mention a passing one
+    # and skips the translate, classify, sentiment and keywords calls
+    enrich_focused = RunnableBranch(
+        (lambda d: not d["text"], skip_llm("low_relevance", 4, lambda d: PASSING_RESULT)),
+        enrich,
     )
 
-    return full_chain
\ No newline at end of file
+    full_chain = with_prefilter_signals(company_name) | RunnableBranch(
+        (is_passing, skip_llm("low_relevance", LLM_CALLS_PER_MENTION["multi-step"], lambda d: PASSING_RESULT)),
+        RunnablePassthrough.assign(text=clean) | RunnablePassthrough.assign(text=focus) | enrich_focused,
+    )
+
+    return full_chain
+
+def get_structured_enrichment_chain(company_name, chat_model=None, rate_limiter=None, use_cache=LLM_CACHE_ENABLED):
+    """
+    Enriches a mention with one LLM call whose JSON answer is validated against
+    `MentionEnrichment`. Output keys match `get_preprocessing_chain`.
+    """
+    stage = get_stage_builder(chat_model, rate_limiter, use_cache)
+    prompt = enrich_prompt.partial(
+        company_name=company_name,
+        format_instructions=enrichment_parser.get_format_instructions(),
+    )
+
+    to_output = RunnableLambda(lambda enriched: {
+        "sentiment": enriched.sentiment,
+        "keywords": ", ".join(enriched.keywords),
+        "type": enriched.type,
+        "translated": enriched.translated,
+    })
+
+    return stage("enrich", prompt) | enrichment_parser | to_output
+
+def get_enrichment_chain(company_name, engine=ENRICHMENT_ENGINE, chat_model=None, rate_limiter=None, use_cache=LLM_CACHE_ENABLED, prefilter=PREFILTER_ENABLED):
+    """
+    Returns the chain used to enrich mentions for `engine`. The structured engine
+    falls back to the multi-step chain for any mention whose answer fails validation.
+    With `prefilter`, passing mentions skip both.
+    """
+    if engine not in ENRICHMENT_ENGINES:
+        raise ValueError(f"Unknown enrichment engine '{engine}', expected one of {ENRICHMENT_ENGINES}")
+
+    multi_step_chain = get_preprocessing_chain(company_name, chat_model, rate_limiter, use_cache, prefilter)
+    if engine == "multi-step":
+        return multi_step_chain
+
+    structured_chain = get_structured_enrichment_chain(company_name, chat_model, rate_limiter, use_cache).with_fallbacks(
+        [multi_step_chain],
+        exceptions_to_handle=(OutputParserException, ValidationError),
+    )
+    if not prefilter:
+        return structured_chain
+    return with_prefilter_signals(company_name) | RunnableBranch(
+        (is_passing, skip_llm("low_relevance", LLM_CALLS_PER_MENTION["structured"], lambda d: PASSING_RESULT)),
+        structured_chain,
+    )
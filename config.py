@@ -6,15 +6,107 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 LLM_MODEL = os.getenv("GPT_MODEL", "gpt-4.1-nano")
 
+# OpenAI quota shared by every client in every process on this host (file-backed); 0 disables a limit
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 200000))
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", 3000))
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", 1000000))
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", "cache/openai_quota.sqlite")
+# Fraction of each quota batch enrichment leaves free for interactive chat
+LLM_BATCH_RESERVE = float(os.getenv("LLM_BATCH_RESERVE", 0.2))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+PREPROCESS_CONCURRENCY = int(os.getenv("PREPROCESS_CONCURRENCY", 8))
+# Mentions read from the input stream per batch_as_completed call
+PREPROCESS_CHUNK_SIZE = int(os.getenv("PREPROCESS_CHUNK_SIZE", 256))
+# "multi-step" (one call per field) or "structured" (one JSON call per mention)
+ENRICHMENT_ENGINE = os.getenv("ENRICHMENT_ENGINE", "multi-step")
+# Gathered mentions at least this similar (MinHash estimate of word-shingle Jaccard) share one enrichment; 1 disables
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.7))
+NEAR_DUPLICATE_NUM_PERM = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", 128))
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", 32))
+# Local language/relevance checks that let enrichment skip LLM calls it doesn't need.
+# Mentions scoring below PREFILTER_MIN_RELEVANCE only name the company in passing and are left out
+# without LLM calls; below PREFILTER_FOCUS_RELEVANCE they are narrowed to the parts about the company first
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+PREFILTER_MIN_RELEVANCE = float(os.getenv("PREFILTER_MIN_RELEVANCE", 0.15))
+PREFILTER_FOCUS_RELEVANCE = float(os.getenv("PREFILTER_FOCUS_RELEVANCE", 0.45))
+
+# Local cache of deterministic (temperature 0) chain responses
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", 90))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 200000))
+
 EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "cache/embeddings")
 VECTOR_DB_PATH = "embeddings/vector_store/"
 
+# Memory budget for loaded FAISS stores kept in-process by the chat API
+RETRIEVER_CACHE_MAX_BYTES = int(os.getenv("RETRIEVER_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# FAISS index per company store: "auto" picks by corpus size (exact Flat up to FAISS_FLAT_MAX_DOCS,
+# HNSW up to FAISS_HNSW_MAX_DOCS, IVF beyond), or force one of "flat", "hnsw", "ivf"
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto")
+FAISS_FLAT_MAX_DOCS = int(os.getenv("FAISS_FLAT_MAX_DOCS", 20000))
+FAISS_HNSW_MAX_DOCS = int(os.getenv("FAISS_HNSW_MAX_DOCS", 500000))
+# Vector compression for HNSW/IVF indexes: "none", "fp16" (half size, ~no recall loss) or "pq" (IVF only,
+# 1/64 size but a large recall loss; check it with benchmarks/bench_vector_index.py first)
+FAISS_COMPRESSION = os.getenv("FAISS_COMPRESSION", "none")
+# Query-time recall/latency trade-off: IVF lists probed, HNSW candidate list size
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 16))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", 128))
+# Memory-map indexes read-only in the chat API, so worker processes share them through the OS page cache
+FAISS_MMAP = os.getenv("FAISS_MMAP", "true").lower() == "true"
+
+# Stage files are JSONL; set to write them gzip-compressed (.jsonl.gz) instead
+DATA_COMPRESSION = os.getenv("DATA_COMPRESSION", "false").lower() == "true"
+
 REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
 REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
 REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT")
+REDDIT_CONCURRENCY = int(os.getenv("REDDIT_CONCURRENCY", 8))
+# Requests kept in hand before waiting for Reddit's rate-limit window to reset
+REDDIT_RATE_LIMIT_RESERVE = int(os.getenv("REDDIT_RATE_LIMIT_RESERVE", 5))
+# Raw posts and comment trees shared by every company, keyed by Reddit id
+REDDIT_STORE_PATH = os.getenv("REDDIT_STORE_PATH", "data/raw/reddit_store.sqlite")
+REDDIT_COMMENTS_TTL_HOURS = float(os.getenv("REDDIT_COMMENTS_TTL_HOURS", 24))
 
 LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
 LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "true")
 LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "Varys")
 
-DB_CONNECTION_URL = os.getenv("DB_CONNECTION_URL")
\ No newline at end of file
+# Chat memory: "window" keeps the last CHAT_MEMORY_WINDOW_TURNS turns plus a rolling summary, "full" replays the session
+CHAT_MEMORY_MODE = os.getenv("CHAT_MEMORY_MODE", "window")
+CHAT_MEMORY_WINDOW_TURNS = int(os.getenv("CHAT_MEMORY_WINDOW_TURNS", 6))
+
+DB_CONNECTION_URL = os.getenv("DB_CONNECTION_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+POPULATE_BATCH_SIZE = int(os.getenv("POPULATE_BATCH_SIZE", 1000))
+
+# Pipeline job queue: worker processes started by the API, global cap on running jobs
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 2))
+PIPELINE_MAX_CONCURRENT_JOBS = int(os.getenv("PIPELINE_MAX_CONCURRENT_JOBS", 2))
+PIPELINE_POLL_INTERVAL = float(os.getenv("PIPELINE_POLL_INTERVAL", 2))
+PIPELINE_JOB_STALE_SECONDS = int(os.getenv("PIPELINE_JOB_STALE_SECONDS", 900))
+# Seconds the API waits on shutdown for workers to reach a stage boundary before killing them
+PIPELINE_WORKER_SHUTDOWN_SECONDS = float(os.getenv("PIPELINE_WORKER_SHUTDOWN_SECONDS", 30))
+# Shared directory the API and its pipeline worker processes write metrics to, aggregated by /metrics;
+# set empty to keep metrics per process (workers' pipeline and LLM metrics then never reach /metrics)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "data/metrics")
+# Companies run at once by the batch entry points (main.py with several companies, monthly_run)
+BATCH_MAX_CONCURRENT_COMPANIES = int(os.getenv("BATCH_MAX_CONCURRENT_COMPANIES", 4))
+
+# Streamed preprocess → populate → embed: items flow between stages through bounded queues
+PIPELINE_STREAMING = os.getenv("PIPELINE_STREAMING", "true").lower() == "true"
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 256))
+STREAM_INSERT_BATCH_SIZE = int(os.getenv("STREAM_INSERT_BATCH_SIZE", 100))
+STREAM_EMBED_BATCH_SIZE = int(os.getenv("STREAM_EMBED_BATCH_SIZE", 100))
+# Seconds a partial micro-batch waits for more items before it is flushed
+STREAM_BATCH_MAX_WAIT = float(os.getenv("STREAM_BATCH_MAX_WAIT", 2.0))
+
+# How long dashboard breakdowns are served from memory before re-reading the rollups
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", 30))
\ No newline at end of file
@@ -1,23 +1,31 @@
 import argparse
-from scrapers.run_scraping import run_scraping_for_company
-from services.run_pipeline import run_info_gathering
-from services.preprocess_mentions import preprocess_mentions
-from services.populate_mentions_agentically import populate_mentions
-from services.rag.retriever import get_company_retriever
-from services.embed_mentions_from_db import build_vectorstore_from_db
+import sys
+from services.pipeline import run_pipeline, PIPELINE_STAGES
+from services.batch_pipeline import run_batch
+from services.companies import list_companies
 from services.db_setup import setup_tables
-from services.companies import set_company_status
+from config import PREPROCESS_CONCURRENCY, ENRICHMENT_ENGINE, BATCH_MAX_CONCURRENT_COMPANIES
 
 setup_tables()
 
 parser = argparse.ArgumentParser(description="Company Review Summarizer CLI")
-parser.add_argument("company", help="Company name to search for")
+parser.add_argument("companies", nargs="*", help="Company names to search for")
+parser.add_argument("--all-companies", action="store_true", default=False, help="Run every company in the companies table")
+parser.add_argument("--max-concurrent", type=int, default=BATCH_MAX_CONCURRENT_COMPANIES, help="Companies processed at once in batch mode")
 parser.add_argument("--limit", type=int, default=10, help="Limit per source")
 parser.add_argument("--scrape", action="store_true", default=False, help="Run scrapers before processing")
+parser.add_argument("--full-scrape", action="store_true", default=False, help="Ignore scrape watermarks and replace the raw data")
 parser.add_argument("--gather", action="store_true", default=False, help="Gather mentions from scraped data")
 parser.add_argument("--preprocess", action="store_true", default=False, help="Run preprocessing on mentions")
-parser.add_argument("--populate-agent", action="store_true", default=False, help="Populate DB with enriched mentions via agent")
+parser.add_argument("--concurrency", type=int, default=PREPROCESS_CONCURRENCY, help="Mentions preprocessed in parallel")
+parser.add_argument("--no-resume", action="store_true", default=False, help="Discard the preprocessing checkpoint and start over")
+parser.add_argument("--no-llm-cache", action="store_true", default=False, help="Bypass the local LLM response cache")
+parser.add_argument("--engine", choices=["multi-step", "structured"], default=ENRICHMENT_ENGINE, help="Enrichment engine used during preprocessing")
+parser.add_argument("--populate", action="store_true", default=False, help="Bulk-load enriched mentions into the DB")
+parser.add_argument("--populate-agent", action="store_true", default=False, help="Populate DB with enriched mentions via agent (one LLM call per mention)")
 parser.add_argument("--embed", action="store_true", default=False, help="Build vector store from DB")
+parser.add_argument("--full-embed", action="store_true", default=False, help="Rebuild the vector store from scratch instead of updating it")
+parser.add_argument("--no-stream", action="store_true", default=False, help="Run preprocess, populate and embed one after another instead of overlapped")
 parser.add_argument("--rag-retriever", action="store_true", default=False, help="Run RAG retriever for the company")
 parser.add_argument("--log-file", type=str, help="Log file to store the output")
 
@@ -25,38 +33,33 @@ parser.add_argument("--all", action="store_true", help="Run all pipeline stages
 
 args = parser.parse_args()
 
-run_all = args.all
-
-try:
-    set_company_status(args.company, "Started", log_file=args.log_file)
-    if args.scrape or run_all:
-        run_scraping_for_company(company=args.company, limit=args.limit)
-    set_company_status(args.company, "Scraping Completed")
-
-    if args.gather or run_all:
-        run_info_gathering(company=args.company)
-    set_company_status(args.company, "Info Gathering Completed")
-
-    if args.preprocess or run_all:
-        preprocess_mentions(company=args.company)
-    set_company_status(args.company, "Preprocessing Completed")
-
-    if args.populate_agent or run_all:
-        populate_mentions(company=args.company)
-    set_company_status(args.company, "DB Population Completed")
-
-    if args.embed or run_all:
-        build_vectorstore_from_db(company=args.company)
-    set_company_status(args.company, "Embedding Completed")
-
-    if args.rag_retriever:
-        retriever = get_company_retriever(args.company)
-        print("✅ Retriever ready for use")
-    set_company_status(args.company, "RAG Retriever Ready")
-
-    print(f"✅ Pipeline completed for {args.company}")
-    set_company_status(args.company, "Completed")
-except Exception as e:
-    print(f"❌ Error occurred: {e}")
-    set_company_status(args.company, "Failed", log_file=str(e))
-    raise e
+if args.all:
+    stages = PIPELINE_STAGES
+else:
+    stages = [stage for stage in PIPELINE_STAGES if getattr(args, stage)]
+
+companies = list_companies() if args.all_companies else args.companies
+if not companies:
+    parser.error("give at least one company, or --all-companies")
+
+options = dict(
+    stages=stages,
+    limit=args.limit,
+    log_file=args.log_file,
+    concurrency=args.concurrency,
+    resume=not args.no_resume,
+    use_cache=not args.no_llm_cache,
+    engine=args.engine,
+    populate_agent=args.populate_agent,
+    full_scrape=args.full_scrape,
+    full_embed=args.full_embed,
+    rag_retriever=args.rag_retriever,
+    streaming=not args.no_stream,
+)
+
+if len(companies) == 1 and not args.all_companies:
+    run_pipeline(company=companies[0], **options)
+else:
+    summary = run_batch(companies, max_concurrent=args.max_concurrent, **options)
+    if any(row["status"] != "completed" for row in summary):
+        sys.exit(1)
@@ -12,4 +12,13 @@ class ChatSession(Base):
     company = Column(String)
     role = Column(String)
     message = Column(Text)
-    timestamp = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+class ChatSessionSummary(Base):
+    __tablename__ = "chat_session_summaries"
+
+    session_id = Column(String, primary_key=True)
+    company = Column(String, primary_key=True)
+    summary = Column(Text, default="")
+    summarized_until_id = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+class MentionEnrichment(BaseModel):
+    """All LLM-derived fields of a `Mention`, produced by a single structured call."""
+    translated: str
+    type: Literal["question", "opinion", "complaint", "praise", "other"]
+    sentiment: Literal["positive", "neutral", "negative"]
+    keywords: List[str] = Field(min_length=1, max_length=8)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List
 
 class Mention(BaseModel):
@@ -9,4 +9,10 @@ class Mention(BaseModel):
     keywords: Optional[List[str]] = []
     text: str
     translated: Optional[str] = None
-    rating: Optional[float] = None
\ No newline at end of file
+    rating: Optional[float] = None
+
+    @field_validator("keywords")
+    @classmethod
+    def normalize_keywords(cls, keywords):
+        # Stored lowercased so keyword filters can use exact JSONB containment
+        return [kw.strip().lower() for kw in keywords or [] if kw.strip()]
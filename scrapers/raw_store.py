@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+import time
+
+from config import REDDIT_STORE_PATH, REDDIT_COMMENTS_TTL_HOURS
+
+
+class RawPostStore:
+    """
+    SQLite store of raw Reddit submissions and comments keyed by their Reddit
+    ids, shared by every company. A post that matches several companies' searches
+    is fetched once; its comment tree is refetched only after `comments_ttl_hours`.
+    """
+
+    def __init__(self, path: str = REDDIT_STORE_PATH, comments_ttl_hours: float = REDDIT_COMMENTS_TTL_HOURS):
+        self.path = path
+        self.comments_ttl = comments_ttl_hours * 3600 if comments_ttl_hours else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reddit_submissions (
+                id TEXT PRIMARY KEY,
+                subreddit TEXT,
+                title TEXT,
+                selftext TEXT,
+                permalink TEXT,
+                created_utc REAL,
+                fetched_at REAL,
+                comments_fetched_at REAL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reddit_comments (
+                id TEXT PRIMARY KEY,
+                submission_id TEXT,
+                body TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reddit_comments_submission ON reddit_comments (submission_id)")
+        self.conn.commit()
+
+    def put_submission(self, sub: str, submission):
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO reddit_submissions (id, subreddit, title, selftext, permalink, created_utc, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    title = excluded.title, selftext = excluded.selftext, fetched_at = excluded.fetched_at
+                """,
+                (submission.id, sub, submission.title, submission.selftext, submission.permalink,
+                 submission.created_utc, time.time()),
+            )
+            self.conn.commit()
+
+    def get_comments(self, submission_id: str):
+        """Stored comment bodies for a submission, or None if missing or stale."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT comments_fetched_at FROM reddit_submissions WHERE id = ?", (submission_id,)
+            ).fetchone()
+            if not row or row[0] is None or (self.comments_ttl and time.time() - row[0] > self.comments_ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [body for (body,) in self.conn.execute(
+                "SELECT body FROM reddit_comments WHERE submission_id = ? ORDER BY rowid", (submission_id,)
+            )]
+
+    def put_comments(self, submission_id: str, comments):
+        """Stores (comment id, body) pairs and marks the submission's tree as fetched."""
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO reddit_comments VALUES (?, ?, ?, ?)",
+                [(comment_id, submission_id, body, now) for comment_id, body in comments],
+            )
+            self.conn.execute(
+                "UPDATE reddit_submissions SET comments_fetched_at = ? WHERE id = ?", (now, submission_id)
+            )
+            self.conn.commit()
+
+    def find_entries(self, company: str):
+        """
+        Submissions whose text or comments mention `company`, in the same shape
+        as the scraper's raw results (`review` plus all `comments`).
+        """
+        # Match the name literally; "_" and "%" in it would otherwise be wildcards
+        escaped = company.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT s.id, s.subreddit, s.title, s.selftext, s.permalink, s.created_utc
+                FROM reddit_submissions s
+                WHERE s.title LIKE :p ESCAPE '\\' OR s.selftext LIKE :p ESCAPE '\\'
+                   OR EXISTS (
+                       SELECT 1 FROM reddit_comments c
+                       WHERE c.submission_id = s.id AND c.body LIKE :p ESCAPE '\\'
+                   )
+                ORDER BY s.created_utc DESC
+                """,
+                {"p": pattern},
+            ).fetchall()
+            entries = []
+            for submission_id, sub, title, selftext, permalink, created_utc in rows:
+                comments = [body for (body,) in self.conn.execute(
+                    "SELECT body FROM reddit_comments WHERE submission_id = ? ORDER BY rowid", (submission_id,)
+                )]
+                entries.append({
+                    "source": f"r/{sub}",
+                    "review": f"{title}\n\n{selftext}".strip(),
+                    "comments": comments,
+                    "post_url": f"https://reddit.com{permalink}",
+                    "submission_id": submission_id,
+                    "created_utc": created_utc,
+                })
+        return entries
+
+    def stats(self):
+        with self._lock:
+            submissions = self.conn.execute("SELECT COUNT(*) FROM reddit_submissions").fetchone()[0]
+            comments = self.conn.execute("SELECT COUNT(*) FROM reddit_comments").fetchone()[0]
+        return {"submissions": submissions, "comments": comments, "hits": self.hits, "misses": self.misses}
+
+
+_default_store = None
+
+def get_raw_store() -> RawPostStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = RawPostStore()
+    return _default_store
@@ -1,55 +1,189 @@
-import praw
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from config import REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT
+
+import praw
+from config import (
+    REDDIT_CLIENT_ID,
+    REDDIT_CLIENT_SECRET,
+    REDDIT_USER_AGENT,
+    REDDIT_CONCURRENCY,
+    REDDIT_RATE_LIMIT_RESERVE,
+)
 from .base import BaseScraper
+from .raw_store import RawPostStore, get_raw_store
+
+TARGET_SUBS = ["technepal", "Nepal", "NepalJobs", "careerguidance", "ITCareerQuestions"]
+REVIEW_KEYWORDS = ["experience", "review", "working at", "work at", "join", "intern at", "interview at", "salary"]
+
+def create_reddit_client():
+    return praw.Reddit(
+        client_id=REDDIT_CLIENT_ID,
+        client_secret=REDDIT_CLIENT_SECRET,
+        user_agent=REDDIT_USER_AGENT
+    )
+
+def build_search_query(company: str, keywords=REVIEW_KEYWORDS) -> str:
+    """One query per subreddit instead of one per keyword: `company (kw1 OR "kw 2" ...)`."""
+    terms = [f'"{kw}"' if " " in kw else kw for kw in keywords]
+    return f"{company} ({' OR '.join(terms)})"
+
+class RateLimitScheduler:
+    """
+    Paces requests across threads using the quota Reddit reports in its
+    X-Ratelimit-* headers (exposed by PRAW as `reddit.auth.limits`). When the
+    remaining budget drops to `reserve`, callers wait for the window to reset.
+    """
+
+    def __init__(self, reserve: int = REDDIT_RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.remaining = None
+        self.reset_at = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                if self.remaining is None or self.remaining > self.reserve:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return
+                wait = (self.reset_at or time.time()) - time.time()
+                if wait <= 0:
+                    self.remaining = None
+                    continue
+            time.sleep(wait)
+
+    def update(self, limits: dict):
+        if not limits or limits.get("remaining") is None:
+            return
+        with self._lock:
+            self.remaining = limits["remaining"]
+            self.reset_at = limits.get("reset_timestamp")
 
 class RedditScraper(BaseScraper):
-    def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=REDDIT_CLIENT_ID,
-            client_secret=REDDIT_CLIENT_SECRET,
-            user_agent=REDDIT_USER_AGENT
-        )
+    def __init__(self, reddit_factory=create_reddit_client, concurrency: int = REDDIT_CONCURRENCY,
+                 scheduler: RateLimitScheduler = None, store: RawPostStore = None):
+        # PRAW instances aren't thread safe, so each worker thread gets its own client.
+        # Every scrape shares one pool, so companies scraped at once by the same scraper
+        # never run more than `concurrency` Reddit threads (and clients) between them.
+        self.reddit_factory = reddit_factory
+        self.concurrency = concurrency
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.store = store or get_raw_store()
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="reddit")
+
+    @property
+    def reddit(self):
+        if not hasattr(self._local, "reddit"):
+            self._local.reddit = self.reddit_factory()
+        return self._local.reddit
+
+    def _call(self, fn):
+        """Runs `fn(reddit)` with this thread's client, then paces the others by the quota that client saw."""
+        reddit = self.reddit
+        self.scheduler.acquire()
+        try:
+            return fn(reddit)
+        finally:
+            self.scheduler.update(getattr(getattr(reddit, "auth", None), "limits", None))
+
+    def search_subreddit(self, sub: str, query: str, limit: int, since: float = None):
+        """
+        Newest-first search of one subreddit. With `since` (a created_utc
+        watermark), stops at the first submission that isn't newer than it.
+        Returns (submissions, complete): `complete` is False when the search
+        hit `limit` first, so older posts after `since` may have been missed.
+        """
+        def fetch(reddit):
+            submissions = []
+            for submission in reddit.subreddit(sub).search(query, sort="new", limit=limit):
+                if since is not None and submission.created_utc <= since:
+                    return submissions, True
+                submissions.append(submission)
+            return submissions, len(submissions) < limit
+
+        return self._call(fetch)
+
+    def fetch_comments(self, sub: str, submission):
+        """Comment bodies for a submission, from the shared store when it has a fresh copy."""
+        self.store.put_submission(sub, submission)
+        comments = self.store.get_comments(submission.id)
+        if comments is not None:
+            return comments
+
+        def fetch(reddit):
+            # The search result belongs to another thread's client; load the tree through this one
+            own = reddit.submission(id=submission.id)
+            own.comments.replace_more(limit=0)
+            return [(c.id, c.body) for c in own.comments.list()]
+
+        fetched = self._call(fetch)
+        self.store.put_comments(submission.id, fetched)
+        return [body for _, body in fetched]
 
     def scrape(self, company: str, limit: int = 10):
-        target_subs = ["technepal", "Nepal", "NepalJobs", "careerguidance", "ITCareerQuestions"]
-        review_keywords = ["experience", "review", "working at", "work at", "join", "intern at", "interview at", "salary"]
+        results, _ = self.scrape_incremental(company, limit)
+        return results
 
-        results = []
+    def scrape_incremental(self, company: str, limit: int = 10, watermarks: dict = None):
+        """
+        Scrapes only submissions newer than the per-subreddit `watermarks`
+        ({sub: created_utc}). Returns (results, updated watermarks); a
+        subreddit's watermark stays put when its search was cut off by the
+        limit, so the posts it didn't reach are picked up on a later run.
+        """
+        watermarks = dict(watermarks or {})
+        query = build_search_query(company)
+        # Keep roughly the same reach as the previous one-search-per-keyword loop
+        search_limit = limit * len(REVIEW_KEYWORDS)
+
+        search_results = list(self._pool.map(
+            lambda sub: self.search_subreddit(sub, query, search_limit, watermarks.get(sub)), TARGET_SUBS
+        ))
+
+        # Dedupe across subreddits (crossposts, repeated hits) before paying for comment trees
+        candidates = []
+        seen_ids = set()
         seen_hashes = set()
+        for sub, (submissions, complete) in zip(TARGET_SUBS, search_results):
+            # Only move past the old watermark once everything newer than it was seen
+            if complete and submissions:
+                watermarks[sub] = max(watermarks.get(sub) or 0, max(s.created_utc for s in submissions))
+            for submission in submissions:
+                unique_string = f"{submission.title}-{submission.selftext}"
+                post_hash = hashlib.md5(unique_string.encode('utf-8')).hexdigest()
+                if submission.id in seen_ids or post_hash in seen_hashes:
+                    continue
+                seen_ids.add(submission.id)
+                seen_hashes.add(post_hash)
+                candidates.append((sub, submission))
+
+        comment_lists = list(self._pool.map(lambda c: self.fetch_comments(*c), candidates))
+
+        results = []
+        for (sub, submission), comments in zip(candidates, comment_lists):
+            post_text = f"{submission.title}\n\n{submission.selftext}"
+            mentions_company = company.lower() in post_text.lower()
+
+            # Extract relevant comments that mention the company
+            relevant_comments = [c for c in comments if company.lower() in c.lower()]
+
+            if mentions_company or relevant_comments:
+                results.append({
+                    "source": f"r/{sub}",
+                    "company": company,
+                    "rating": None,
+                    "review": post_text.strip(),
+                    "comments": relevant_comments,
+                    "date": datetime.utcfromtimestamp(submission.created_utc).isoformat(),
+                    "role": None,
+                    "post_url": f"https://reddit.com{submission.permalink}",
+                    "submission_id": submission.id,
+                    "created_utc": submission.created_utc,
+                })
 
-        for sub in target_subs:
-            subreddit = self.reddit.subreddit(sub)
-            for keyword in review_keywords:
-                search_query = f"{company} {keyword}"
-                for submission in subreddit.search(search_query, sort="new", limit=limit):
-                    post_text = f"{submission.title}\n\n{submission.selftext}"
-                    import hashlib
-                    unique_string = f"{submission.title}-{submission.selftext}"
-                    post_hash = hashlib.md5(unique_string.encode('utf-8')).hexdigest()
-                    if post_hash in seen_hashes:
-                        continue
-                    seen_hashes.add(post_hash)
-
-                    mentions_company = company.lower() in post_text.lower()
-
-                    # Extract relevant comments that mention the company
-                    submission.comments.replace_more(limit=0)
-                    relevant_comments = [
-                        c.body for c in submission.comments.list()
-                        if company.lower() in c.body.lower()
-                    ]
-
-                    if mentions_company or relevant_comments:
-                        results.append({
-                            "source": f"r/{sub}",
-                            "company": company,
-                            "rating": None,
-                            "review": post_text.strip(),
-                            "comments": relevant_comments,
-                            "date": datetime.utcfromtimestamp(submission.created_utc).isoformat(),
-                            "role": None,
-                            "post_url": f"https://reddit.com{submission.permalink}"
-                        })
-
-        return results
\ No newline at end of file
+        return results, watermarks
@@ -1,15 +1,51 @@
+import json
+import os
+
 from scrapers.reddit_scraper import RedditScraper
 
-from utils.io import save_json
+from utils.io import save_json, find_record_file, iter_records, record_path, write_records
+
+RAW_FOLDER = "data/raw"
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-def run_scraping_for_company(company: str, limit: int = 10):
+def merge_raw_results(existing, new):
+    """
+    Streams stored posts with freshly scraped ones merged in, keyed by post URL.
+    A post seen again keeps its place and gains any new relevant comments;
+    unseen posts follow at the end.
+    """
+    new_by_url = {entry["post_url"]: entry for entry in new}
+    for entry in existing:
+        fresh = new_by_url.pop(entry["post_url"], None)
+        if fresh is not None:
+            comments = entry.get("comments", [])
+            entry["comments"] = comments + [c for c in fresh.get("comments", []) if c not in comments]
+        yield entry
+    yield from new_by_url.values()
+
+def run_scraping_for_company(company: str, limit: int = 10, incremental: bool = True, reddit_scraper: RedditScraper = None):
     print(f"🔍 Running scrapers for: {company}")
 
+    raw_stem = f"reddit_{company}"
+    watermark_path = os.path.join(RAW_FOLDER, f"reddit_{company}.watermarks.json")
+
     # # Run Reddit scraper
     print("Starting Reddit scraping...")
-    reddit_scraper = RedditScraper()
-    reddit_results = reddit_scraper.scrape(company=company, limit=limit)
-    save_json(reddit_results, f"reddit_{company}.json")
-    print(f"✅ Reddit scraping completed for {company}")
+    # Batch runs pass one scraper so every company shares its clients and rate-limit scheduler
+    reddit_scraper = reddit_scraper or RedditScraper()
+    watermarks = load_json(watermark_path, {}) if incremental else {}
+    reddit_results, watermarks = reddit_scraper.scrape_incremental(company=company, limit=limit, watermarks=watermarks)
+
+    existing_file = find_record_file(RAW_FOLDER, raw_stem) if incremental else None
+    existing = iter_records(existing_file) if existing_file else []
+    write_records(merge_raw_results(existing, reddit_results), record_path(RAW_FOLDER, raw_stem))
+    save_json(watermarks, os.path.basename(watermark_path), folder=RAW_FOLDER)
+    print(f"✅ Reddit scraping completed for {company} ({len(reddit_results)} posts scraped)")
 
-    print(f"✅ Scraping completed for {company}")
\ No newline at end of file
+    print(f"✅ Scraping completed for {company}")
+    return len(reddit_results)
@@ -1,36 +1,39 @@
 # scripts/monthly_run.py
 
 import argparse
-from scrapers.reddit_scraper import scrape
-from services.gather_reddit_mentions import gather_mentions_from_reddit
-from services.preprocess_mentions import preprocess_mentions
-from utils.io import save_json
+import sys
+from services.batch_pipeline import run_batch
+from services.companies import list_companies
+from config import BATCH_MAX_CONCURRENT_COMPANIES
 
 def main():
     parser = argparse.ArgumentParser(description="Monthly review scraper and preprocessor")
-    parser.add_argument("company", help="Company name to track")
+    parser.add_argument("companies", nargs="*", help="Companies to track (default: every company in the DB)")
     parser.add_argument("--populate", action="store_true", help="Populate DB after preprocessing")
+    parser.add_argument("--embed", action="store_true", help="Update vector stores after populating")
+    parser.add_argument("--limit", type=int, default=10, help="Limit per source")
+    parser.add_argument("--max-concurrent", type=int, default=BATCH_MAX_CONCURRENT_COMPANIES, help="Companies processed at once")
     args = parser.parse_args()
 
-    company = args.company
-
-    print(f"🔄 Scraping Reddit for {company}...")
-    scrape(company)
-
-    print(f"📥 Gathering structured mentions...")
-    raw_path = f"data/raw/reddit_{company}.json"
-    mentions = gather_mentions_from_reddit(raw_path, company)
-    save_json(mentions, f"reddit_mentions_{company}.json", folder="data/processed")
-
-    print(f"🧠 Preprocessing...")
-    preprocess_mentions(company)
+    companies = args.companies or list_companies()
+    if not companies:
+        print("❌ No companies given and none found in the DB.")
+        sys.exit(1)
 
+    stages = ["scrape", "gather", "preprocess"]
     if args.populate:
-        from services.populate_mentions_agentically import populate_mentions
-        print(f"🗃️ Populating DB...")
-        populate_mentions(company)
+        stages.append("populate")
+        if args.embed:
+            stages.append("embed")
+
+    print(f"🔄 Monthly run for {len(companies)} companies...")
+    summary = run_batch(companies, max_concurrent=args.max_concurrent, stages=stages, limit=args.limit)
 
+    failed = [row["company"] for row in summary if row["status"] != "completed"]
+    if failed:
+        print(f"⚠️ Monthly run finished with failures: {', '.join(failed)}")
+        sys.exit(1)
     print("✅ Monthly run complete.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+from services.db_setup import get_async_engine
+from utils.ttl_cache import ttl_cache
+from config import ANALYTICS_CACHE_TTL_SECONDS
+
+ROLLUP_DIMENSIONS = ("sentiment", "type", "keyword")
+
+@ttl_cache(ANALYTICS_CACHE_TTL_SECONDS)
+async def get_rollup(company: str, dimension: str):
+    """
+    Returns [(value, count), ...] for one company and dimension, most frequent
+    first, from the trigger-maintained mention_rollups table.
+    """
+    if dimension not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension '{dimension}'")
+
+    query = """
+        SELECT NULLIF(value, ''), count
+        FROM mention_rollups
+        WHERE company = :company AND dimension = :dimension
+        ORDER BY count DESC, value
+    """
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(text(query), {"company": company, "dimension": dimension})
+        return [(row[0], row[1]) for row in result.fetchall()]
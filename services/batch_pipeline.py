@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapers.reddit_scraper import RedditScraper
+from services.db_setup import setup_tables
+from services.pipeline import run_pipeline, PipelineCancelled
+from config import BATCH_MAX_CONCURRENT_COMPANIES, REDDIT_CONCURRENCY
+
+def run_batch(companies, max_concurrent: int = BATCH_MAX_CONCURRENT_COMPANIES, **options):
+    """
+    Runs the pipeline for several companies in one process, up to
+    `max_concurrent` at a time. Every run shares the process-wide LLM client,
+    OpenAI rate limiter, DB pool and caches, plus one RedditScraper: its
+    thread pool and the PRAW clients on those threads are shared by every
+    company, so the batch runs at most REDDIT_CONCURRENCY Reddit threads in
+    total and paces one Reddit quota. `options` are passed to run_pipeline.
+    Returns one summary dict per company, in input order.
+    """
+    setup_tables()
+    max_concurrent = max(1, max_concurrent)
+    reddit_scraper = RedditScraper(concurrency=REDDIT_CONCURRENCY)
+
+    def run_one(company):
+        start = time.perf_counter()
+        status, error = "completed", None
+        try:
+            run_pipeline(company=company, reddit_scraper=reddit_scraper, **options)
+        except PipelineCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", str(e)
+        return {
+            "company": company,
+            "status": status,
+            "seconds": round(time.perf_counter() - start, 1),
+            "error": error,
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrent) as pool:
+        summary = list(pool.map(run_one, companies))
+
+    print_batch_summary(summary, time.perf_counter() - start)
+    return summary
+
+def print_batch_summary(summary, elapsed: float):
+    width = max([len(row["company"]) for row in summary] + [len("Company")])
+    print(f"\n📋 Batch summary ({len(summary)} companies in {elapsed:.1f}s)")
+    print(f"{'Company':<{width}}  {'Status':<10}  {'Seconds':>8}  Error")
+    for row in summary:
+        print(f"{row['company']:<{width}}  {row['status']:<10}  {row['seconds']:>8.1f}  {row['error'] or ''}")
@@ -1,6 +1,7 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import datetime
-from services.db_setup import engine
+from services.db_setup import engine, get_async_engine
 from models.companies import Company
 
 def set_company_status(name: str, status: str, log_file: str = None):
@@ -24,3 +25,14 @@ def get_company_status(name: str):
     with Session(engine) as session:
         company = session.get(Company, name)
         return company.status if company else None
+
+def list_companies():
+    with Session(engine) as session:
+        return list(session.scalars(select(Company.name).order_by(Company.name)))
+
+async def aget_company_status(name: str):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async with AsyncSession(get_async_engine()) as session:
+        company = await session.get(Company, name)
+        return company.status if company else None
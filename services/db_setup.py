@@ -1,89 +1,113 @@
-from sqlalchemy import create_engine, text
-from config import DB_CONNECTION_URL
+import shlex
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from config import (
+    DB_CONNECTION_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_STATEMENT_TIMEOUT_MS,
+)
 from sqlalchemy.orm import declarative_base
+from services.migrations import run_migrations
+from utils.metrics import instrument_engine
 
 Base = declarative_base()
 
-engine = create_engine(DB_CONNECTION_URL)
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
 
-def setup_tables():
-    create_companies_table()
-    create_mentions_table()
-    create_chat_sessions_table()
+# libpq URL parameters asyncpg's connect() takes as they are
+ASYNCPG_CONNECT_PARAMS = ("ssl", "passfile", "target_session_attrs")
 
-def create_mentions_table():
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = 'mentions'
-            )
-        """))
-        if result.scalar():
-            print("Table 'mentions' already exists.")
-            return
+def parse_pg_options(options: str) -> dict:
+    """Server settings from a libpq `options` string ("-c key=value --key=value ...")."""
+    settings = {}
+    args = shlex.split(options)
+    for i, arg in enumerate(args):
+        if arg == "-c" and i + 1 < len(args):
+            arg = args[i + 1]
+        elif arg.startswith("-c"):
+            arg = arg[2:]
+        elif arg.startswith("--"):
+            arg = arg[2:]
+        else:
+            continue
+        key, sep, value = arg.partition("=")
+        if sep:
+            settings[key.replace("-", "_")] = value
+    return settings
 
-        conn.execute(text("""
-        CREATE TABLE mentions (
-            id SERIAL PRIMARY KEY,
-            company TEXT,
-            source TEXT,
-            type TEXT,
-            sentiment TEXT,
-            keywords JSON,
-            text TEXT,
-            translated TEXT,
-            rating FLOAT
-        )
-        """))
-        conn.commit()
-        print("Table 'mentions' created.")
+def get_async_engine_args(url: str):
+    """
+    (URL, connect_args) for an asyncpg engine on the same database as a
+    postgres:// / postgresql[+driver]:// URL. asyncpg rejects libpq's query
+    parameters, so the ones it has an equivalent for are translated into
+    connect() arguments (`server_settings` for session settings) and the rest
+    are dropped.
+    """
+    url = make_url(url)
+    if not url.drivername.startswith("postgres"):
+        return url, {}
+
+    connect_args, server_settings = {}, {}
+    for key, value in url.query.items():
+        if isinstance(value, tuple):
+            value = value[-1]
+        if key == "sslmode":
+            connect_args["ssl"] = value
+        elif key == "connect_timeout":
+            connect_args["timeout"] = float(value)
+        elif key == "application_name":
+            server_settings["application_name"] = value
+        elif key == "options":
+            server_settings.update(parse_pg_options(value))
+        elif key in ASYNCPG_CONNECT_PARAMS:
+            connect_args[key] = value
+        else:
+            print(f"⚠️ Ignoring database URL parameter '{key}', which asyncpg doesn't support")
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+    return url.set(drivername="postgresql+asyncpg", query={}), connect_args
 
-def create_chat_sessions_table():
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = 'chat_sessions'
-            )
-        """))
-        if result.scalar():
-            print("Table 'chat_sessions' already exists.")
-            return
+# Used by the pipeline (CLI, tools, agents)
+engine = create_engine(DB_CONNECTION_URL, **POOL_SETTINGS)
 
-        conn.execute(text("""
-        CREATE TABLE chat_sessions (
-            id SERIAL PRIMARY KEY,
-            session_id TEXT,
-            company TEXT,
-            role TEXT, -- 'user' or 'ai'
-            message TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+instrument_engine(engine, "sync")
+
+_async_engine = None
+
+def get_async_engine():
+    """
+    The API's asyncpg engine, created on first use so the CLI and pipeline
+    workers never need asyncpg or greenlet. Queries beyond
+    DB_STATEMENT_TIMEOUT_MS are cancelled server-side.
+    """
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_url, async_connect_args = get_async_engine_args(DB_CONNECTION_URL)
+        _async_engine = create_async_engine(
+            async_url,
+            connect_args={
+                **async_connect_args,
+                "server_settings": {
+                    "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+                    **async_connect_args.get("server_settings", {}),
+                },
+            },
+            **POOL_SETTINGS,
         )
-        """))
-        conn.commit()
-        print("Table 'chat_sessions' created.")
-        
-def create_companies_table():
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = 'companies'
-            )
-        """))
-        if result.scalar():
-            print("Table 'companies' already exists.")
-            return
+        instrument_engine(_async_engine.sync_engine, "async")
+    return _async_engine
 
-        conn.execute(text("""
-            CREATE TABLE companies (
-                id SERIAL PRIMARY KEY,
-                name TEXT UNIQUE NOT NULL,
-                status TEXT DEFAULT 'preparing',
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                log_file TEXT
-            )
-        """))
-        conn.commit()
-        print("Table 'companies' created.")
\ No newline at end of file
+def setup_tables():
+    run_migrations(engine)
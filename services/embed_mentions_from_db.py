@@ -1,56 +1,169 @@
 # scripts/embed_mentions_from_db.py
 
+import hashlib
+import json
+import os
+
 from sqlalchemy import text as sql_text
 from services.db_setup import engine
+from services.rag.retriever_cache import get_vectorstore_path
+from services.rag.vector_index import build_vectorstore, fit_vectorstore, delete_documents, save_vectorstore
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+from utils.openai_clients import get_embedding_model
+from config import EMBEDDING_MODEL, EMBEDDING_CACHE_DIR
+
+def get_cached_embeddings(model: str = EMBEDDING_MODEL):
+    """
+    OpenAI embeddings backed by a local file store. Vectors are keyed by a hash of
+    the text under a per-model namespace, so unchanged mentions are never re-embedded;
+    cache misses draw from the shared embeddings quota as batch work.
+    """
+    store = LocalFileStore(EMBEDDING_CACHE_DIR)
+    return CacheBackedEmbeddings.from_bytes_store(
+        get_embedding_model(priority="batch", model=model, stage="embed"),
+        store,
+        namespace=model,
+    )
 
-# Updated import to address LangChain deprecation warning
-try:
-    from langchain_openai import OpenAIEmbeddings
-except ImportError:
-    from langchain_community.embeddings import OpenAIEmbeddings
+def get_doc_id(mention_id, page_content: str, metadata: dict) -> str:
+    """Stable docstore id: changes whenever the mention's text or metadata changes."""
+    payload = json.dumps([mention_id, page_content, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-def build_vectorstore_from_db(company):
+def load_mention_documents(company):
     with engine.connect() as conn:
         result = conn.execute(
             sql_text("""
-                SELECT type, sentiment, keywords, text, translated
+                SELECT id, type, sentiment, keywords, text, translated
                 FROM mentions
                 WHERE company = :company
             """),
             {"company": company}
         ).fetchall()
 
-    docs = []
+    docs = {}
     for row in result:
-        page_content = row._mapping["translated"] or row._mapping["text"]
-        if not page_content:
-            continue
-
-        docs.append(Document(
-            page_content=page_content,
-            metadata={
-                "type": row._mapping["type"],
-                "sentiment": row._mapping["sentiment"],
-                "keywords": row._mapping["keywords"],
-                "company": company
-            }
-        ))
+        doc = mention_document(row, company)
+        if doc:
+            docs[doc[0]] = doc[1]
+
+    return docs
+
+def mention_document(row, company):
+    """(doc_id, Document) for a mentions row, or None if it has no text."""
+    page_content = row._mapping["translated"] or row._mapping["text"]
+    if not page_content:
+        return None
+
+    metadata = {
+        "type": row._mapping["type"],
+        "sentiment": row._mapping["sentiment"],
+        "keywords": row._mapping["keywords"],
+        "company": company
+    }
+    return get_doc_id(row._mapping["id"], page_content, metadata), Document(page_content=page_content, metadata=metadata)
+
+class VectorstoreAppender:
+    """
+    Adds mention rows to a company's FAISS store batch by batch, for streamed
+    runs. The existing index is extended unless `incremental` is False; nothing
+    is written to disk until `save()`, which also moves the store to the index
+    type its final size calls for.
+    """
+
+    def __init__(self, company, incremental: bool = True, embeddings=None):
+        self.company = company
+        self.path = get_vectorstore_path(company)
+        self.embeddings = embeddings or get_cached_embeddings()
+        self.vectorstore = None
+        self.ids = set()
+        self.added = 0
+        if incremental and os.path.exists(os.path.join(self.path, "index.faiss")):
+            self.vectorstore = FAISS.load_local(self.path, self.embeddings, allow_dangerous_deserialization=True)
+            self.ids = set(self.vectorstore.index_to_docstore_id.values())
+
+    def _add(self, docs: dict):
+        ids = [doc_id for doc_id in docs if doc_id not in self.ids]
+        if not ids:
+            return []
+        new_docs = [docs[doc_id] for doc_id in ids]
+        if self.vectorstore is None:
+            self.vectorstore = FAISS.from_documents(new_docs, self.embeddings, ids=ids)
+        else:
+            self.vectorstore.add_documents(new_docs, ids=ids)
+        self.ids.update(ids)
+        self.added += len(ids)
+        return ids
+
+    def add_rows(self, rows):
+        """Embeds mention rows not already in the store; returns the new doc ids."""
+        return self._add(dict(doc for doc in (mention_document(row, self.company) for row in rows) if doc))
+
+    def sync(self, docs: dict):
+        """
+        Brings the store in line with `docs` ({doc_id: Document}, as returned by
+        load_mention_documents). Returns (added, removed) counts.
+        """
+        removed_ids = list(self.ids - docs.keys())
+        if removed_ids:
+            self.vectorstore = delete_documents(self.vectorstore, removed_ids, self.embeddings)
+            self.ids.difference_update(removed_ids)
+        return len(self._add(docs)), len(removed_ids)
+
+    def save(self):
+        if self.vectorstore is not None:
+            self.vectorstore = fit_vectorstore(self.vectorstore, self.embeddings)
+            save_vectorstore(self.vectorstore, self.path)
+
+def build_vectorstore_from_db(company, incremental: bool = True, embeddings=None):
+    """
+    Builds or updates the company's FAISS store from the DB and returns the
+    number of documents in it. `embeddings` overrides the cached OpenAI model.
+    The index type follows the corpus size (see services/rag/vector_index.py);
+    an update that changes it rebuilds the index.
+    """
+    docs = load_mention_documents(company)
 
     if not docs:
         print(f"⚠️ No documents found for {company}. Skipping vectorstore creation.")
-        return
+        return 0
+
+    path = get_vectorstore_path(company)
+    embeddings = embeddings or get_cached_embeddings()
+
+    if incremental and os.path.exists(os.path.join(path, "index.faiss")):
+        vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        existing_ids = set(vectorstore.index_to_docstore_id.values())
+
+        removed_ids = list(existing_ids - docs.keys())
+        new_ids = [doc_id for doc_id in docs if doc_id not in existing_ids]
+
+        if not removed_ids and not new_ids:
+            print(f"✅ Vector store for {company} is up to date ({len(docs)} documents)")
+            return len(docs)
+
+        if removed_ids:
+            vectorstore = delete_documents(vectorstore, removed_ids, embeddings)
+        if new_ids:
+            vectorstore.add_documents([docs[doc_id] for doc_id in new_ids], ids=new_ids)
+        vectorstore = fit_vectorstore(vectorstore, embeddings)
+        save_vectorstore(vectorstore, path)
+
+        print(f"✅ Updated vector store for {company} (+{len(new_ids)} / -{len(removed_ids)}, {len(docs)} documents)")
+        return len(docs)
 
-    embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
-    vectorstore = FAISS.from_documents(docs, embeddings)
-    vectorstore.save_local(f"vectorstores/{company.lower()}_mentions")
+    vectorstore = build_vectorstore(docs, embeddings)
+    save_vectorstore(vectorstore, path)
 
     print(f"✅ Saved vector store for {company} ({len(docs)} documents)")
+    return len(docs)
 
 if __name__ == "__main__":
     import sys
     if len(sys.argv) < 2:
         print("❌ Please provide a company name as an argument.")
     else:
-        build_vectorstore_from_db(sys.argv[1])
+        build_vectorstore_from_db(sys.argv[1], incremental="--full" not in sys.argv[2:])
@@ -1,33 +1,50 @@
-import json
-import os
+from itertools import chain
 
-def gather_mentions_from_reddit(file_path: str, company_name: str):
-    with open(file_path, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
+from utils.io import iter_records
+from utils.mentions import get_mention_key
+from utils.near_duplicates import NearDuplicateIndex
+from config import NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_BANDS
+
+def gather_mentions_from_reddit(file_path: str, company_name: str, store=None, near_duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD):
+    """
+    Yields posts and comments mentioning `company_name` from the company's raw
+    file (JSONL or legacy .json) and, if given, from the shared raw store, which
+    also holds posts that were fetched while scraping other companies.
+
+    Exact repeats are dropped. Near-duplicates (quoted replies, crossposts,
+    lightly edited reposts) are kept but carry `duplicate_of`, the mention key
+    of the first mention of their group, so preprocessing enriches that one and
+    copies its result.
+    """
+    raw_data = chain(
+        iter_records(file_path) if file_path else [],
+        store.find_entries(company_name) if store is not None else [],
+    )
 
-    results = []
     company_lower = company_name.lower()
     seen_texts = set()
+    index = NearDuplicateIndex(near_duplicate_threshold, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_BANDS) if near_duplicate_threshold < 1 else None
+
+    def mention(text, mention_type):
+        seen_texts.add(text)
+        item = {
+            "source": "Reddit",
+            "text": text,
+            "type": mention_type
+        }
+        if index is not None:
+            representative = index.find_or_add(get_mention_key(item), text)
+            if representative is not None:
+                item["duplicate_of"] = representative
+        return item
 
     for entry in raw_data:
         post_text = entry.get("review", "")
         if company_lower in post_text.lower():
             if post_text not in seen_texts:
-                results.append({
-                    "source": "Reddit",
-                    "text": post_text,
-                    "type": "post"
-                })
-                seen_texts.add(post_text)
+                yield mention(post_text, "post")
 
         for comment in entry.get("comments", []):
             if company_lower in comment.lower():
                 if comment not in seen_texts:
-                    results.append({
-                        "source": "Reddit",
-                        "text": comment,
-                        "type": "comment"
-                    })
-                    seen_texts.add(comment)
-
-    return results
\ No newline at end of file
+                    yield mention(comment, "comment")
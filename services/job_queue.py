@@ -0,0 +1,172 @@
+import json
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text, bindparam
+from services.db_setup import engine
+from config import PIPELINE_MAX_CONCURRENT_JOBS, PIPELINE_JOB_STALE_SECONDS
+
+ACTIVE_STATUSES = ("queued", "running")
+
+JOB_COLUMNS = "id, company, options, status, cancel_requested, worker_id, log_file, error, created_at, started_at, finished_at"
+
+def job_to_dict(row):
+    job = dict(row._mapping)
+    if isinstance(job["options"], str):
+        job["options"] = json.loads(job["options"])
+    for key in ("created_at", "started_at", "finished_at"):
+        if hasattr(job[key], "isoformat"):
+            job[key] = job[key].isoformat()
+    return job
+
+def get_job(job_id: int):
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(f"SELECT {JOB_COLUMNS} FROM pipeline_jobs WHERE id = :id"), {"id": job_id}
+        ).fetchone()
+    return job_to_dict(row) if row else None
+
+def list_jobs(company: str = None, limit: int = 50):
+    query = f"SELECT {JOB_COLUMNS} FROM pipeline_jobs"
+    params = {"limit": limit}
+    if company:
+        query += " WHERE company = :company"
+        params["company"] = company
+    query += " ORDER BY id DESC LIMIT :limit"
+    with engine.connect() as conn:
+        return [job_to_dict(row) for row in conn.execute(text(query), params).fetchall()]
+
+def enqueue_job(company: str, options: dict):
+    """
+    Queues a pipeline run. If the company already has a queued or running job,
+    that job is returned instead. Returns (job, created).
+    """
+    log_file = f"{company}_{int(time.time())}.log"
+    with engine.begin() as conn:
+        row = conn.execute(
+            text(f"""
+                INSERT INTO pipeline_jobs (company, options, log_file)
+                VALUES (:company, :options, :log_file)
+                ON CONFLICT (company) WHERE status IN ('queued', 'running') DO NOTHING
+                RETURNING {JOB_COLUMNS}
+            """),
+            {"company": company, "options": json.dumps(options), "log_file": log_file}
+        ).fetchone()
+        if row:
+            return job_to_dict(row), True
+
+        row = conn.execute(
+            text(f"""
+                SELECT {JOB_COLUMNS} FROM pipeline_jobs
+                WHERE company = :company AND status IN ('queued', 'running')
+            """),
+            {"company": company}
+        ).fetchone()
+    return job_to_dict(row), False
+
+def requeue_stale_jobs():
+    """Puts running jobs whose worker stopped heartbeating back in the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=PIPELINE_JOB_STALE_SECONDS)
+    with engine.begin() as conn:
+        return conn.execute(
+            text("""
+                UPDATE pipeline_jobs SET status = 'queued', worker_id = NULL
+                WHERE status = 'running' AND heartbeat_at < :cutoff
+            """),
+            {"cutoff": cutoff}
+        ).rowcount
+
+def requeue_worker_jobs(worker_ids):
+    """Puts the running jobs claimed by `worker_ids` back in the queue, e.g. after those workers were stopped."""
+    if not worker_ids:
+        return 0
+    with engine.begin() as conn:
+        return conn.execute(
+            text("""
+                UPDATE pipeline_jobs SET status = 'queued', worker_id = NULL
+                WHERE status = 'running' AND worker_id IN :worker_ids
+            """).bindparams(bindparam("worker_ids", expanding=True)),
+            {"worker_ids": list(worker_ids)}
+        ).rowcount
+
+def claim_next_job(worker_id: str, max_running: int = PIPELINE_MAX_CONCURRENT_JOBS):
+    """
+    Claims the oldest queued job for `worker_id`, unless `max_running` jobs are
+    already running. Claims are a conditional UPDATE, so two workers never get
+    the same job.
+    """
+    with engine.begin() as conn:
+        running = conn.execute(text("SELECT COUNT(*) FROM pipeline_jobs WHERE status = 'running'")).scalar()
+        if running >= max_running:
+            return None
+
+        candidates = conn.execute(
+            text("SELECT id FROM pipeline_jobs WHERE status = 'queued' ORDER BY id LIMIT 5")
+        ).fetchall()
+
+    for (job_id,) in candidates:
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            claimed = conn.execute(
+                text("""
+                    UPDATE pipeline_jobs
+                    SET status = 'running', worker_id = :worker_id, started_at = :now, heartbeat_at = :now
+                    WHERE id = :id AND status = 'queued'
+                """),
+                {"id": job_id, "worker_id": worker_id, "now": now}
+            ).rowcount
+        if not claimed:
+            continue
+
+        # Another worker may have claimed concurrently; give the job back if over the cap
+        with engine.begin() as conn:
+            running = conn.execute(text("SELECT COUNT(*) FROM pipeline_jobs WHERE status = 'running'")).scalar()
+            if running > max_running:
+                conn.execute(
+                    text("UPDATE pipeline_jobs SET status = 'queued', worker_id = NULL WHERE id = :id"),
+                    {"id": job_id}
+                )
+                return None
+        return get_job(job_id)
+
+    return None
+
+def heartbeat(job_id: int) -> bool:
+    """Records that the job is still alive; returns True if cancellation was requested."""
+    with engine.begin() as conn:
+        row = conn.execute(
+            text("""
+                UPDATE pipeline_jobs SET heartbeat_at = :now WHERE id = :id
+                RETURNING cancel_requested
+            """),
+            {"id": job_id, "now": datetime.utcnow()}
+        ).fetchone()
+    return bool(row and row[0])
+
+def finish_job(job_id: int, status: str, error: str = None):
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE pipeline_jobs SET status = :status, error = :error, finished_at = :now
+                WHERE id = :id
+            """),
+            {"id": job_id, "status": status, "error": error, "now": datetime.utcnow()}
+        )
+
+def cancel_job(job_id: int):
+    """
+    Cancels a queued job immediately; a running job is flagged and stops at the
+    next stage boundary. Returns the updated job, or None if it doesn't exist.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE pipeline_jobs SET status = 'cancelled', finished_at = :now
+                WHERE id = :id AND status = 'queued'
+            """),
+            {"id": job_id, "now": datetime.utcnow()}
+        )
+        conn.execute(
+            text("UPDATE pipeline_jobs SET cancel_requested = TRUE WHERE id = :id AND status = 'running'"),
+            {"id": job_id}
+        )
+    return get_job(job_id)
@@ -0,0 +1,250 @@
+from sqlalchemy import text
+
+# Ordered schema migrations: (version, description, statements).
+# Applied versions are recorded in schema_migrations; never edit a released
+# migration, append a new one instead.
+MIGRATIONS = [
+    (1, "create companies, mentions and chat_sessions", [
+        """
+        CREATE TABLE IF NOT EXISTS companies (
+            id SERIAL PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            status TEXT DEFAULT 'preparing',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            log_file TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS mentions (
+            id SERIAL PRIMARY KEY,
+            company TEXT,
+            source TEXT,
+            type TEXT,
+            sentiment TEXT,
+            keywords JSON,
+            text TEXT,
+            translated TEXT,
+            rating FLOAT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            id SERIAL PRIMARY KEY,
+            session_id TEXT,
+            company TEXT,
+            role TEXT, -- 'user' or 'ai'
+            message TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "unique (company, text_hash) key on mentions", [
+        """
+        ALTER TABLE mentions
+        ADD COLUMN IF NOT EXISTS text_hash TEXT GENERATED ALWAYS AS (md5(text)) STORED
+        """,
+        # Older rows may hold duplicates from before the key existed; keep the first copy
+        """
+        DELETE FROM mentions a USING mentions b
+        WHERE a.id > b.id AND a.company = b.company AND a.text_hash = b.text_hash
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS mentions_company_text_hash_key ON mentions (company, text_hash)",
+    ]),
+    (3, "filter indexes for mentions and chat_sessions", [
+        "CREATE INDEX IF NOT EXISTS mentions_company_id_idx ON mentions (company, id DESC)",
+        "CREATE INDEX IF NOT EXISTS mentions_company_type_idx ON mentions (company, type)",
+        "CREATE INDEX IF NOT EXISTS mentions_company_sentiment_idx ON mentions (company, sentiment)",
+        "CREATE INDEX IF NOT EXISTS chat_sessions_session_company_ts_idx ON chat_sessions (session_id, company, timestamp)",
+        "CREATE INDEX IF NOT EXISTS chat_sessions_company_session_ts_idx ON chat_sessions (company, session_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS chat_sessions_company_role_idx ON chat_sessions (company, role)",
+    ]),
+    (4, "mentions.keywords as lowercased JSONB with a GIN index", [
+        "ALTER TABLE mentions ALTER COLUMN keywords TYPE JSONB USING lower(keywords::text)::jsonb",
+        "CREATE INDEX IF NOT EXISTS mentions_keywords_gin_idx ON mentions USING GIN (keywords jsonb_path_ops)",
+    ]),
+    (5, "per-company sentiment/type/keyword rollups maintained by triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS mention_rollups (
+            company TEXT NOT NULL,
+            dimension TEXT NOT NULL, -- 'sentiment', 'type' or 'keyword'
+            value TEXT NOT NULL,     -- '' stands for NULL
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (company, dimension, value)
+        )
+        """,
+        # Statement-level triggers see a whole bulk insert at once through the
+        # transition tables, so a batch costs one upsert rather than one per row.
+        """
+        CREATE OR REPLACE FUNCTION refresh_mention_rollups() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO mention_rollups (company, dimension, value, count)
+                SELECT company, dimension, value, COUNT(*)
+                FROM (
+                    SELECT company, 'sentiment' AS dimension, COALESCE(sentiment, '') AS value FROM new_rows
+                    UNION ALL
+                    SELECT company, 'type', COALESCE(type, '') FROM new_rows
+                    UNION ALL
+                    SELECT company, 'keyword', kw FROM new_rows,
+                        jsonb_array_elements_text(CASE WHEN jsonb_typeof(keywords) = 'array' THEN keywords ELSE '[]'::jsonb END) AS kw
+                ) delta
+                WHERE company IS NOT NULL
+                GROUP BY company, dimension, value
+                ON CONFLICT (company, dimension, value)
+                DO UPDATE SET count = mention_rollups.count + EXCLUDED.count;
+            END IF;
+
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE mention_rollups r
+                SET count = r.count - delta.n
+                FROM (
+                    SELECT company, dimension, value, COUNT(*) AS n
+                    FROM (
+                        SELECT company, 'sentiment' AS dimension, COALESCE(sentiment, '') AS value FROM old_rows
+                        UNION ALL
+                        SELECT company, 'type', COALESCE(type, '') FROM old_rows
+                        UNION ALL
+                        SELECT company, 'keyword', kw FROM old_rows,
+                            jsonb_array_elements_text(CASE WHEN jsonb_typeof(keywords) = 'array' THEN keywords ELSE '[]'::jsonb END) AS kw
+                    ) d
+                    GROUP BY company, dimension, value
+                ) delta
+                WHERE r.company = delta.company AND r.dimension = delta.dimension AND r.value = delta.value;
+
+                DELETE FROM mention_rollups WHERE count <= 0;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS mentions_rollups_insert ON mentions",
+        """
+        CREATE TRIGGER mentions_rollups_insert AFTER INSERT ON mentions
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION refresh_mention_rollups()
+        """,
+        "DROP TRIGGER IF EXISTS mentions_rollups_update ON mentions",
+        """
+        CREATE TRIGGER mentions_rollups_update AFTER UPDATE ON mentions
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION refresh_mention_rollups()
+        """,
+        "DROP TRIGGER IF EXISTS mentions_rollups_delete ON mentions",
+        """
+        CREATE TRIGGER mentions_rollups_delete AFTER DELETE ON mentions
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION refresh_mention_rollups()
+        """,
+        # Backfill from the rows that existed before the triggers
+        "DELETE FROM mention_rollups",
+        """
+        INSERT INTO mention_rollups (company, dimension, value, count)
+        SELECT company, dimension, value, COUNT(*)
+        FROM (
+            SELECT company, 'sentiment' AS dimension, COALESCE(sentiment, '') AS value FROM mentions
+            UNION ALL
+            SELECT company, 'type', COALESCE(type, '') FROM mentions
+            UNION ALL
+            SELECT company, 'keyword', kw FROM mentions,
+                jsonb_array_elements_text(CASE WHEN jsonb_typeof(keywords) = 'array' THEN keywords ELSE '[]'::jsonb END) AS kw
+        ) src
+        WHERE company IS NOT NULL
+        GROUP BY company, dimension, value
+        """,
+    ]),
+    (6, "rolling chat session summaries", [
+        """
+        CREATE TABLE IF NOT EXISTS chat_session_summaries (
+            session_id TEXT NOT NULL,
+            company TEXT NOT NULL,
+            summary TEXT NOT NULL DEFAULT '',
+            summarized_until_id INTEGER NOT NULL DEFAULT 0, -- last chat_sessions.id folded into the summary
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (session_id, company)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS chat_sessions_session_company_id_idx ON chat_sessions (session_id, company, id DESC)",
+    ]),
+    (7, "pipeline job queue", [
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_jobs (
+            id SERIAL PRIMARY KEY,
+            company TEXT NOT NULL,
+            options JSONB NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'queued', -- queued, running, completed, failed, cancelled
+            cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+            worker_id TEXT,
+            log_file TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        # At most one queued or running job per company: dedupes submissions and serializes runs
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS pipeline_jobs_active_company_key
+        ON pipeline_jobs (company) WHERE status IN ('queued', 'running')
+        """,
+        "CREATE INDEX IF NOT EXISTS pipeline_jobs_status_id_idx ON pipeline_jobs (status, id)",
+    ]),
+    (8, "pipeline run history with per-stage metrics", [
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            id SERIAL PRIMARY KEY,
+            company TEXT NOT NULL,
+            stages JSONB NOT NULL DEFAULT '[]',
+            status TEXT NOT NULL DEFAULT 'running', -- running, completed, failed, cancelled
+            stage_metrics JSONB NOT NULL DEFAULT '[]',
+            totals JSONB NOT NULL DEFAULT '{}',
+            error TEXT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP,
+            duration_seconds FLOAT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS pipeline_runs_company_id_idx ON pipeline_runs (company, id DESC)",
+    ]),
+]
+
+# Arbitrary key for pg_advisory_xact_lock, so concurrent processes don't migrate at once
+MIGRATION_LOCK_ID = 7_310_842
+
+
+def get_applied_versions(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine):
+    """Applies every pending migration, each in its own transaction."""
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        applied = get_applied_versions(conn)
+
+    pending = [m for m in MIGRATIONS if m[0] not in applied]
+    if not pending:
+        print("Database schema is up to date.")
+        return
+
+    for version, description, statements in pending:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            # Another process may have applied it while we waited for the lock
+            if version in get_applied_versions(conn):
+                continue
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                {"version": version, "description": description},
+            )
+        print(f"Applied migration {version}: {description}")
@@ -0,0 +1,143 @@
+import time
+
+from scrapers.run_scraping import run_scraping_for_company
+from services.run_pipeline import run_info_gathering
+from services.preprocess_mentions import preprocess_mentions
+from services.populate_mentions import populate_mentions_bulk
+from services.rag.retriever import get_company_retriever
+from services.embed_mentions_from_db import build_vectorstore_from_db
+from services.companies import set_company_status
+from services.pipeline_runs import start_run, finish_run
+from utils.metrics import PIPELINE_RUNS, Tally, tally, record_stage
+from config import PREPROCESS_CONCURRENCY, ENRICHMENT_ENGINE, LLM_CACHE_ENABLED, PIPELINE_STREAMING
+
+PIPELINE_STAGES = ("scrape", "gather", "preprocess", "populate", "embed")
+# Stages that can run overlapped through the streaming executor
+STREAMED_STAGES = ("preprocess", "populate", "embed")
+
+class PipelineCancelled(Exception):
+    pass
+
+class PipelineRequeued(PipelineCancelled):
+    """The run was stopped to be run again later (its worker is shutting down), not cancelled."""
+
+def run_pipeline(
+    company: str,
+    stages=PIPELINE_STAGES,
+    limit: int = 10,
+    log_file: str = None,
+    concurrency: int = PREPROCESS_CONCURRENCY,
+    resume: bool = True,
+    use_cache: bool = LLM_CACHE_ENABLED,
+    engine: str = ENRICHMENT_ENGINE,
+    populate_agent: bool = False,
+    full_scrape: bool = False,
+    full_embed: bool = False,
+    rag_retriever: bool = False,
+    streaming: bool = PIPELINE_STREAMING,
+    reddit_scraper=None,
+    should_cancel=None,
+    should_requeue=None,
+):
+    """
+    Runs the selected pipeline stages for a company in order, recording progress
+    in `companies`. `should_cancel()` and `should_requeue()` are polled between
+    stages; when one returns True the run stops with `PipelineCancelled`, or
+    with `PipelineRequeued` when it will be run again. With `streaming`, a run
+    that includes preprocess, populate and embed overlaps them instead.
+    """
+    stage_metrics = []
+
+    def checkpoint(status):
+        set_company_status(company, status)
+        if should_requeue and should_requeue():
+            raise PipelineRequeued(f"Pipeline for {company} was stopped and requeued")
+        if should_cancel and should_cancel():
+            raise PipelineCancelled(f"Pipeline for {company} was cancelled")
+
+    def run_stage(name, fn):
+        """Runs one stage, recording its duration and item count."""
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        if isinstance(result, dict):
+            # Streamed stages report per-stage stats from the executor
+            for stage_name, stats in result.items():
+                record_stage(stage_name, stats["busy_seconds"], stats["items_out"])
+            stage_metrics.append({"stage": name, "seconds": round(seconds, 3), "stages": result})
+        else:
+            items = result if isinstance(result, int) else 0
+            record_stage(name, seconds, items)
+            stage_metrics.append({"stage": name, "seconds": round(seconds, 3), "items": items})
+        return result
+
+    run_id = None
+    try:
+        run_id = start_run(company, stages)
+    except Exception as e:
+        print(f"⚠️ Could not record pipeline run: {e}")
+    run_started = time.perf_counter()
+    usage_before = tally.snapshot()
+    status, error = "completed", None
+
+    try:
+        set_company_status(company, "Started", log_file=log_file)
+        if "scrape" in stages:
+            run_stage("scrape", lambda: run_scraping_for_company(company=company, limit=limit, incremental=not full_scrape, reddit_scraper=reddit_scraper))
+        checkpoint("Scraping Completed")
+
+        if "gather" in stages:
+            run_stage("gather", lambda: run_info_gathering(company=company))
+        checkpoint("Info Gathering Completed")
+
+        if streaming and not populate_agent and all(stage in stages for stage in STREAMED_STAGES):
+            from services.streaming_pipeline import stream_mentions
+            run_stage("stream", lambda: stream_mentions(company=company, concurrency=concurrency, resume=resume, use_cache=use_cache, engine=engine, full_embed=full_embed))
+            stages = [stage for stage in stages if stage not in STREAMED_STAGES]
+
+        if "preprocess" in stages:
+            run_stage("preprocess", lambda: preprocess_mentions(company=company, concurrency=concurrency, resume=resume, use_cache=use_cache, engine=engine))
+        checkpoint("Preprocessing Completed")
+
+        if populate_agent:
+            from services.populate_mentions_agentically import populate_mentions
+            run_stage("populate", lambda: populate_mentions(company=company))
+        elif "populate" in stages:
+            run_stage("populate", lambda: populate_mentions_bulk(company=company))
+        checkpoint("DB Population Completed")
+
+        if "embed" in stages:
+            run_stage("embed", lambda: build_vectorstore_from_db(company=company, incremental=not full_embed))
+        checkpoint("Embedding Completed")
+
+        if rag_retriever:
+            get_company_retriever(company)
+            print("✅ Retriever ready for use")
+        set_company_status(company, "RAG Retriever Ready")
+
+        print(f"✅ Pipeline completed for {company}")
+        set_company_status(company, "Completed")
+    except PipelineRequeued as e:
+        status = "requeued"
+        print(f"↩️ {e}")
+        set_company_status(company, "Queued")
+        raise
+    except PipelineCancelled as e:
+        status = "cancelled"
+        print(f"🛑 {e}")
+        set_company_status(company, "Cancelled")
+        raise
+    except Exception as e:
+        status, error = "failed", str(e)
+        print(f"❌ Error occurred: {e}")
+        set_company_status(company, "Failed", log_file=str(e))
+        raise e
+    finally:
+        PIPELINE_RUNS.labels(status).inc()
+        # LLM, cache and DB usage are process-wide, so concurrent batch runs share them
+        totals = Tally.delta(usage_before, tally.snapshot())
+        if run_id is not None:
+            try:
+                finish_run(run_id, status, stage_metrics, totals, round(time.perf_counter() - run_started, 3), error)
+            except Exception as e:
+                print(f"⚠️ Could not record pipeline run: {e}")
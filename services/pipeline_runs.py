@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+from sqlalchemy import text
+from services.db_setup import engine
+
+RUN_COLUMNS = "id, company, stages, status, stage_metrics, totals, error, started_at, finished_at, duration_seconds"
+
+def run_to_dict(row):
+    run = dict(row._mapping)
+    for key in ("stages", "stage_metrics", "totals"):
+        if isinstance(run[key], str):
+            run[key] = json.loads(run[key])
+    for key in ("started_at", "finished_at"):
+        if hasattr(run[key], "isoformat"):
+            run[key] = run[key].isoformat()
+    return run
+
+def start_run(company: str, stages) -> int:
+    with engine.begin() as conn:
+        return conn.execute(
+            text("INSERT INTO pipeline_runs (company, stages) VALUES (:company, :stages) RETURNING id"),
+            {"company": company, "stages": json.dumps(list(stages))}
+        ).scalar()
+
+def finish_run(run_id: int, status: str, stage_metrics, totals: dict, duration_seconds: float, error: str = None):
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE pipeline_runs
+                SET status = :status, stage_metrics = :stage_metrics, totals = :totals,
+                    error = :error, finished_at = :now, duration_seconds = :duration
+                WHERE id = :id
+            """),
+            {
+                "id": run_id,
+                "status": status,
+                "stage_metrics": json.dumps(stage_metrics),
+                "totals": json.dumps(totals),
+                "error": error,
+                "now": datetime.utcnow(),
+                "duration": duration_seconds,
+            }
+        )
+
+def list_runs(company: str = None, limit: int = 50):
+    query = f"SELECT {RUN_COLUMNS} FROM pipeline_runs"
+    params = {"limit": limit}
+    if company:
+        query += " WHERE company = :company"
+        params["company"] = company
+    query += " ORDER BY id DESC LIMIT :limit"
+    with engine.connect() as conn:
+        return [run_to_dict(row) for row in conn.execute(text(query), params).fetchall()]
@@ -0,0 +1,155 @@
+# services/pipeline_worker.py
+#
+# Long-lived workers that drain the pipeline_jobs queue. Each worker imports
+# LangChain, builds its clients and runs migrations once, then executes jobs
+# one at a time:
+#   python -m services.pipeline_worker --workers 2
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from contextlib import redirect_stdout, redirect_stderr
+
+from config import PIPELINE_POLL_INTERVAL, PIPELINE_WORKERS, PIPELINE_WORKER_SHUTDOWN_SECONDS
+
+HEARTBEAT_INTERVAL = 30
+
+# Set by stop_workers; shared with every worker process start_workers spawned
+_stop_event = None
+
+def execute_job(job, stopping=None):
+    """
+    Runs one claimed job. If `stopping` is set while it runs, the job stops at
+    the next stage boundary and goes back in the queue instead of finishing.
+    """
+    from services.job_queue import heartbeat, finish_job, requeue_worker_jobs
+    from services.pipeline import run_pipeline, PipelineCancelled, PipelineRequeued
+
+    cancel_requested = threading.Event()
+    finished = threading.Event()
+
+    def beat():
+        while not finished.wait(HEARTBEAT_INTERVAL):
+            try:
+                if heartbeat(job["id"]):
+                    cancel_requested.set()
+            except Exception as e:
+                print(f"⚠️ Heartbeat failed for job {job['id']}: {e}")
+
+    threading.Thread(target=beat, daemon=True).start()
+
+    def should_cancel():
+        if not cancel_requested.is_set() and heartbeat(job["id"]):
+            cancel_requested.set()
+        return cancel_requested.is_set()
+
+    os.makedirs("logs", exist_ok=True)
+    status, error = "completed", None
+    with open(os.path.join("logs", job["log_file"]), "a") as log:
+        with redirect_stdout(log), redirect_stderr(log):
+            try:
+                run_pipeline(
+                    company=job["company"],
+                    log_file=job["log_file"],
+                    should_cancel=should_cancel,
+                    should_requeue=lambda: stopping is not None and stopping.is_set(),
+                    **job["options"],
+                )
+            except PipelineRequeued:
+                status = "requeued"
+            except PipelineCancelled:
+                status = "cancelled"
+            except Exception as e:
+                status, error = "failed", str(e)
+            finally:
+                finished.set()
+
+    if status == "requeued":
+        requeue_worker_jobs([job["worker_id"]])
+    else:
+        finish_job(job["id"], status, error)
+    print(f"🏁 Job {job['id']} for {job['company']} {status}")
+
+def run_worker(worker_id: str = None, poll_interval: float = PIPELINE_POLL_INTERVAL, stopping=None):
+    from services.db_setup import setup_tables
+    from services.job_queue import claim_next_job, requeue_stale_jobs
+    # Import the pipeline up front so its startup cost is paid once per worker, not per job
+    import services.pipeline  # noqa: F401
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    stopping = stopping or threading.Event()
+    setup_tables()
+    print(f"👷 Pipeline worker {worker_id} ready")
+
+    while not stopping.is_set():
+        try:
+            requeue_stale_jobs()
+            job = claim_next_job(worker_id)
+        except Exception as e:
+            print(f"⚠️ Worker {worker_id} could not poll the job queue: {e}")
+            job = None
+
+        if job is None:
+            stopping.wait(poll_interval)
+            continue
+
+        print(f"▶️ Worker {worker_id} running job {job['id']} for {job['company']}")
+        execute_job(job, stopping)
+
+    print(f"👋 Pipeline worker {worker_id} stopped")
+
+def start_workers(count: int = PIPELINE_WORKERS):
+    """Starts `count` worker processes, named by their worker ids, and returns them."""
+    global _stop_event
+    context = multiprocessing.get_context("spawn")
+    if _stop_event is None:
+        _stop_event = context.Event()
+    processes = []
+    for i in range(count):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{i}"
+        process = context.Process(target=run_worker, name=worker_id, args=(worker_id,),
+                                  kwargs={"stopping": _stop_event}, daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+def stop_workers(processes, timeout: float = PIPELINE_WORKER_SHUTDOWN_SECONDS):
+    """
+    Asks the workers to stop, waits up to `timeout` seconds for them to put
+    their jobs back at a stage boundary, then kills the rest and requeues the
+    jobs they still held, so they don't sit as 'running' until they go stale.
+    """
+    from services.job_queue import requeue_worker_jobs
+    from utils.metrics import mark_process_dead
+
+    if _stop_event is not None:
+        _stop_event.set()
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        process.join(max(0, deadline - time.monotonic()))
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for process in processes:
+        mark_process_dead(process.pid)
+    requeued = requeue_worker_jobs([process.name for process in processes])
+    if requeued:
+        print(f"↩️ Requeued {requeued} pipeline jobs from stopped workers")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline job queue worker")
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS, help="Number of worker processes")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker()
+    else:
+        from utils.metrics import mark_process_dead
+
+        for process in start_workers(args.workers):
+            process.join()
+            mark_process_dead(process.pid)
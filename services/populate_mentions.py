@@ -0,0 +1,84 @@
+import json
+from sqlalchemy import text
+from pydantic import ValidationError
+from langsmith import trace
+from schemas.mention import Mention
+from services.db_setup import engine, setup_tables
+from config import POPULATE_BATCH_SIZE
+from utils.io import find_record_file, iter_records, iter_batches
+
+# One statement per batch: rows travel as a single JSON array and are expanded server-side
+INSERT_MENTIONS_SQL = """
+    INSERT INTO mentions (company, source, type, sentiment, keywords, text, translated, rating)
+    SELECT company, source, type, sentiment, keywords, text, translated, rating
+    FROM json_to_recordset(CAST(:rows AS json)) AS r(
+        company TEXT, source TEXT, type TEXT, sentiment TEXT,
+        keywords JSONB, text TEXT, translated TEXT, rating FLOAT
+    )
+    ON CONFLICT (company, text_hash) DO NOTHING
+"""
+
+# Same insert, returning what the embedding stage needs for each new row
+INSERT_MENTIONS_RETURNING_SQL = INSERT_MENTIONS_SQL + """
+    RETURNING id, type, sentiment, keywords, text, translated
+"""
+
+def to_mention(mention: dict, company: str) -> Mention:
+    """Validates an enriched mention from the preprocessing output as a `Mention`."""
+    mention = {**mention, "company": company}
+    if isinstance(mention.get("keywords"), str):
+        mention["keywords"] = [kw.strip() for kw in mention["keywords"].split(",") if kw.strip()]
+    return Mention(**mention)
+
+def insert_mentions(mentions, batch_size: int = POPULATE_BATCH_SIZE) -> int:
+    """
+    Inserts `Mention`s in batches of `batch_size`, one transaction per batch.
+    Mentions already stored for the company (same text) are skipped by the
+    unique (company, text_hash) index. Returns the number of new rows.
+    """
+    inserted = 0
+    for start in range(0, len(mentions), batch_size):
+        rows = [m.model_dump() for m in mentions[start:start + batch_size]]
+        with engine.begin() as conn:
+            result = conn.execute(text(INSERT_MENTIONS_SQL), {"rows": json.dumps(rows, ensure_ascii=False)})
+            inserted += result.rowcount
+    return inserted
+
+def insert_mentions_returning(mentions):
+    """Inserts one batch of `Mention`s in a transaction and returns the rows that were new."""
+    rows = [m.model_dump() for m in mentions]
+    with engine.begin() as conn:
+        return conn.execute(
+            text(INSERT_MENTIONS_RETURNING_SQL), {"rows": json.dumps(rows, ensure_ascii=False)}
+        ).fetchall()
+
+def populate_mentions_bulk(company: str, batch_size: int = POPULATE_BATCH_SIZE):
+    setup_tables()
+
+    path = find_record_file("data/processed", f"enriched_mentions_{company}")
+    if path is None:
+        raise FileNotFoundError(f"No enriched mentions for {company} in data/processed")
+
+    counts = {"read": 0, "invalid": 0}
+
+    def valid_mentions():
+        for i, mention in enumerate(iter_records(path)):
+            counts["read"] += 1
+            try:
+                yield to_mention(mention, company)
+            except ValidationError as e:
+                counts["invalid"] += 1
+                print(f"❌ Skipping invalid mention {i+1}: {e}")
+
+    inserted = 0
+    with trace(
+        name="populate_mentions_bulk",
+        metadata={"company": company, "input_file": path},
+        tags=["population", "bulk", "mentions"]
+    ):
+        for batch in iter_batches(valid_mentions(), batch_size):
+            inserted += insert_mentions(batch, batch_size)
+
+    valid = counts["read"] - counts["invalid"]
+    print(f"✅ Inserted {inserted} new mentions for {company} ({valid - inserted} already present, {counts['invalid']} invalid)")
+    return inserted
@@ -1,30 +1,25 @@
-import json
 from agents.mention_insert_agent import agent_executor
-from schemas.mention import Mention
-from services.db_setup import create_mentions_table
+from services.populate_mentions import to_mention
+from services.db_setup import setup_tables
 from langsmith import trace
+from utils.io import find_record_file, iter_records
 
 def populate_mentions(company: str):
-    create_mentions_table()  # Ensure table is created and truncated
+    setup_tables()  # Ensure the schema is migrated
 
-    path = f"data/processed/enriched_mentions_{company}.json"
-
-    with open(path, "r", encoding="utf-8") as f:
-        mentions = json.load(f)
+    path = find_record_file("data/processed", f"enriched_mentions_{company}")
+    if path is None:
+        raise FileNotFoundError(f"No enriched mentions for {company} in data/processed")
 
     with trace(
         name="populate_mentions_agentically",
-        metadata={"company": company, "mention_count": len(mentions)},
+        metadata={"company": company, "input_file": path},
         tags=["population", "agent", "mentions"]
     ):
-        for i, mention in enumerate(mentions):
-            print(f"\n🔄 Inserting mention {i+1}/{len(mentions)}...")
-            mention["company"] = company
-            if isinstance(mention.get("keywords"), str):
-                mention["keywords"] = [kw.strip() for kw in mention["keywords"].split(",")]
-
+        for i, mention in enumerate(iter_records(path)):
+            print(f"\n🔄 Inserting mention {i+1}...")
             try:
-                parsed = Mention(**mention)
+                parsed = to_mention(mention, company)
                 with trace(
                     name="insert_single_mention",
                     metadata={"mention_index": i, "company": parsed.company, "type": parsed.type},
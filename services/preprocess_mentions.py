@@ -1,25 +1,165 @@
-import json
+import os
 from tqdm import tqdm
-from chains.preprocessing_chain import get_preprocessing_chain
+from chains.preprocessing_chain import get_enrichment_chain, LLM_CALLS_PER_MENTION
 from langsmith import trace
-from config import LANGSMITH_PROJECT
+from config import LANGSMITH_PROJECT, PREPROCESS_CONCURRENCY, PREPROCESS_CHUNK_SIZE, LLM_CACHE_ENABLED, ENRICHMENT_ENGINE
+from utils.llm_cache import get_llm_cache
+from utils.metrics import record_llm_calls_saved
+from utils.io import append_jsonl, read_jsonl, find_record_file, iter_records, record_path, write_records, iter_batches, index_jsonl, read_jsonl_at, truncate_partial_line
+from utils.mentions import get_mention_key
 
-import hashlib
+def clean_result(result):
+    return {
+        key: value.content if hasattr(value, "content") else value
+        for key, value in result.items()
+    }
 
-def get_mention_key(item):
-    """Use ID if available, otherwise use hash of text."""
-    if item.get("id"):
-        return str(item["id"])
-    return hashlib.md5(item["text"].encode("utf-8")).hexdigest()
+def mention_input(item):
+    """Chain input for a gathered mention, with the pre-filter signals when it has them."""
+    return {key: item[key] for key in ("text", "language", "relevance") if key in item}
 
-def preprocess_mentions(company: str):
-    input_file = f"data/processed/reddit_mentions_{company}.json"
-    output_file = f"data/processed/enriched_mentions_{company}.json"
+def get_mention_config(item, concurrency: int = PREPROCESS_CONCURRENCY):
+    return {
+        "max_concurrency": concurrency,
+        "run_name": "preprocess_single_mention",
+        "metadata": {"mention_key": get_mention_key(item), "text": item["text"]},
+        "tags": ["mention"],
+    }
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def enrich_mentions(chain, items, concurrency: int = PREPROCESS_CONCURRENCY):
+    """
+    Runs `chain` over `items` with up to `concurrency` mentions in flight.
+    Yields (index, item, result) as mentions finish; result is the exception if one failed.
+    """
+    inputs = [mention_input(item) for item in items]
+    configs = [get_mention_config(item, concurrency) for item in items]
+    for index, result in chain.batch_as_completed(inputs, config=configs, return_exceptions=True):
+        yield index, items[index], result
 
-    enriched_dict = {}
+def get_checkpoint_file(company: str):
+    return f"data/processed/enriched_mentions_{company}.checkpoint.jsonl"
+
+def get_input_file(company: str):
+    path = find_record_file("data/processed", f"reddit_mentions_{company}")
+    if path is None:
+        raise FileNotFoundError(f"No gathered mentions for {company} in data/processed")
+    return path
+
+def is_low_relevance(record):
+    """Whether the pre-filter found the mention only names the company in passing; such mentions aren't stored."""
+    return bool(record.get("low_relevance"))
+
+def load_checkpoint_keys(company: str):
+    """Keys of every mention already enriched."""
+    return {get_mention_key(record) for record in read_jsonl(get_checkpoint_file(company))}
+
+def finalize_checkpoint(company: str, input_file: str = None):
+    """
+    Writes enriched_mentions_<company>.jsonl from the checkpoint, keeping only
+    mentions that are still part of the gathered input, in input order however
+    they finished enriching. Low-relevance mentions stay in the checkpoint, so
+    they aren't sent to the LLM again, but are left out. Only the checkpoint's key → offset index is held
+    in memory; records are read back from it as the input is streamed.
+    Returns the number of mentions written.
+    """
+    checkpoint_file = get_checkpoint_file(company)
+    offsets = index_jsonl(checkpoint_file, get_mention_key)
+    low_relevance = 0
+
+    def enriched():
+        nonlocal low_relevance
+        with open(checkpoint_file, "rb") as checkpoint:
+            for item in iter_records(input_file or get_input_file(company)):
+                if not item.get("text"):
+                    continue
+                # Popped so a key repeated in the input is written once
+                offset = offsets.pop(get_mention_key(item), None)
+                if offset is None:
+                    continue
+                record = read_jsonl_at(checkpoint, offset)
+                if is_low_relevance(record):
+                    low_relevance += 1
+                    continue
+                yield record
+
+    count = write_records(enriched(), record_path("data/processed", f"enriched_mentions_{company}"))
+    if low_relevance:
+        print(f"🔎 Left out {low_relevance} mentions that only name {company} in passing")
+    return count
+
+def iter_pending_mentions(input_file: str, done_keys: set, duplicates: dict = None):
+    """
+    Yields gathered mentions not yet enriched, once per distinct mention key.
+    With `duplicates`, near-duplicates are held back there instead, grouped by
+    the key of the mention they duplicate, for `copy_duplicate_results`.
+    """
+    for item in iter_records(input_file):
+        if not item.get("text"):
+            print(f"⚠️ Skipping item without text: {item}")
+            continue
+        mention_key = get_mention_key(item)
+        if mention_key in done_keys:
+            continue
+        # Duplicate texts in the input only need enriching once
+        done_keys.add(mention_key)
+        if duplicates is not None and item.get("duplicate_of"):
+            duplicates.setdefault(item["duplicate_of"], []).append(item)
+            continue
+        yield item
+
+def copy_duplicate_results(company: str, duplicates: dict, checkpoint, engine: str = ENRICHMENT_ENGINE):
+    """
+    Checkpoints each held-back near-duplicate with its representative's
+    enrichment. Groups whose representative isn't enriched (it failed) are left
+    in `duplicates` for the next run. Returns the copied records.
+    """
+    copied = []
+    for record in read_jsonl(get_checkpoint_file(company)):
+        for item in duplicates.pop(get_mention_key(record), []):
+            copied.append({**record, **item})
+    for record in copied:
+        append_jsonl(record, checkpoint)
+
+    if copied:
+        saved_calls = len(copied) * LLM_CALLS_PER_MENTION[engine]
+        record_llm_calls_saved("near_duplicate", saved_calls)
+        print(f"♻️ Copied enrichment to {len(copied)} near-duplicate mentions, saving ~{saved_calls} LLM calls")
+    pending = sum(len(items) for items in duplicates.values())
+    if pending:
+        print(f"⚠️ {pending} near-duplicates wait on a representative that failed preprocessing")
+    return copied
+
+def prepare_checkpoint(company: str, resume: bool = True):
+    """
+    Discards the checkpoint unless resuming, and drops a line a crash left
+    half-written so the next append doesn't merge into it. Returns the keys
+    already enriched.
+    """
+    checkpoint_file = get_checkpoint_file(company)
+    if not resume and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+    if truncate_partial_line(checkpoint_file):
+        print(f"⚠️ Dropped a partially written record from {checkpoint_file}")
+    done_keys = load_checkpoint_keys(company)
+    if done_keys:
+        print(f"⏭️ Resuming: {len(done_keys)} mentions already preprocessed")
+    return done_keys
+
+def report_llm_cache():
+    for stage, stats in get_llm_cache().stats().items():
+        print(f"🗄️ LLM cache [{stage}]: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})")
+
+def preprocess_mentions(company: str, concurrency: int = PREPROCESS_CONCURRENCY, chat_model=None, rate_limiter=None, resume: bool = True, use_cache: bool = LLM_CACHE_ENABLED, engine: str = ENRICHMENT_ENGINE, chunk_size: int = PREPROCESS_CHUNK_SIZE):
+    input_file = get_input_file(company)
+    output_file = record_path("data/processed", f"enriched_mentions_{company}")
+    checkpoint_file = get_checkpoint_file(company)
+
+    done_keys = prepare_checkpoint(company, resume)
+    duplicates = {}
+
+    processed = 0
+    failed = 0
 
     with trace(
         name="preprocess_mentions",
@@ -27,34 +167,34 @@ def preprocess_mentions(company: str):
             "company": company,
             "input_file": input_file,
             "output_file": output_file,
-            "num_mentions": len(data),
+            "concurrency": concurrency,
+            "engine": engine,
         },
         tags=["preprocessing", "mentions"],
         project_name=LANGSMITH_PROJECT,
     ):
-        chain = get_preprocessing_chain(company)
-
-        for item in tqdm(data, desc="Preprocessing"):
-            mention_key = get_mention_key(item)
-            if not item.get("text"):
-                print(f"⚠️ Skipping item without text: {item}")
-                continue
-
-            with trace(
-                name="preprocess_single_mention",
-                metadata={"mention_key": mention_key, "text": item.get("text")},
-                tags=["mention"],
-            ):
-                result = chain.invoke({"text": item["text"]})
-                cleaned = {
-                    key: value.content if hasattr(value, "content") else value
-                    for key, value in result.items()
-                }
-                enriched_dict[mention_key] = {**item, **cleaned}
-
-    enriched_list = list(enriched_dict.values())
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(enriched_list, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Preprocessing complete. Saved {len(enriched_list)} unique mentions to {output_file}")
+        chain = get_enrichment_chain(company, engine=engine, chat_model=chat_model, rate_limiter=rate_limiter, use_cache=use_cache)
+
+        with open(checkpoint_file, "a", encoding="utf-8") as checkpoint, tqdm(desc="Preprocessing") as progress:
+            # The input is read a chunk at a time, so memory doesn't grow with the corpus
+            for items in iter_batches(iter_pending_mentions(input_file, done_keys, duplicates), chunk_size):
+                for index, item, result in enrich_mentions(chain, items, concurrency):
+                    processed += 1
+                    progress.update()
+                    if isinstance(result, Exception):
+                        failed += 1
+                        print(f"❌ Failed to preprocess mention {get_mention_key(item)}: {result}")
+                        continue
+                    append_jsonl({**item, **clean_result(result)}, checkpoint)
+
+            copied = copy_duplicate_results(company, duplicates, checkpoint, engine)
+            processed += len(copied)
+
+    saved = finalize_checkpoint(company, input_file)
+
+    if failed:
+        print(f"⚠️ {failed} of {processed} mentions failed preprocessing; rerun to retry them")
+    if use_cache:
+        report_llm_cache()
+    print(f"✅ Preprocessing complete. Saved {saved} unique mentions to {output_file}")
+    return processed
@@ -1,20 +1,36 @@
+import asyncio
+from datetime import datetime
 from services.rag.retriever import get_company_retriever
-from langchain_community.chat_models import ChatOpenAI
 from langchain.chains import RetrievalQA
-from sqlalchemy.orm import Session
-from services.db_setup import engine
-from models.chat_sessions import ChatSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.db_setup import get_async_engine
+from models.chat_sessions import ChatSession, ChatSessionSummary
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
-from langchain.schema import HumanMessage, AIMessage
-from config import LLM_MODEL
+from langchain.memory.prompt import SUMMARY_PROMPT
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
+from utils.openai_clients import get_chat_model
+from config import CHAT_MEMORY_MODE, CHAT_MEMORY_WINDOW_TURNS
 
-def get_rag_response(company: str, query: str, session_id: str = "default") -> str:
+# Tags the LLM that writes the final answer, so only its tokens are streamed
+ANSWER_TAG = "rag_answer"
+
+# Summary updates run after the response is sent; keep references so they aren't garbage collected
+_summary_tasks = set()
+
+async def build_rag_chain(company: str, session_id: str, llm=None, memory_mode: str = CHAT_MEMORY_MODE):
     # 1. Load history from DB
-    history = get_memory(session_id, company)
+    if memory_mode == "window":
+        summary, history = await get_windowed_memory(session_id, company)
+    else:
+        summary, history = None, await get_memory(session_id, company)
 
     # 2. Format messages into LangChain-compatible messages
     messages = []
+    if summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
     for role, msg in history:
         if role == "user":
             messages.append(HumanMessage(content=msg))
@@ -25,42 +41,154 @@ def get_rag_response(company: str, query: str, session_id: str = "default") -> s
     memory = ConversationBufferMemory(return_messages=True, memory_key="chat_history")
     memory.chat_memory.messages = messages
 
-    # 4. Load retriever and LLM
-    retriever = get_company_retriever(company)
-    llm = ChatOpenAI(model=LLM_MODEL, temperature=0)
+    # 4. Load retriever and LLM (a cold FAISS load is blocking disk I/O, keep it off the event loop)
+    retriever = await asyncio.to_thread(get_company_retriever, company)
+    llm = llm or get_chat_model(priority="interactive", stage="rag_answer")
 
     # 5. Construct chain with memory
-    qa = ConversationalRetrievalChain.from_llm(
+    return ConversationalRetrievalChain.from_llm(
         llm=llm,
         retriever=retriever,
         memory=memory,
+        # Rephrasing the follow-up question is internal; keep it apart from the answer LLM
+        condense_question_llm=get_chat_model(priority="interactive", stage="condense_question"),
         return_source_documents=False  # Optional
     )
 
+async def get_rag_response(company: str, query: str, session_id: str = "default", memory_mode: str = CHAT_MEMORY_MODE) -> str:
+    qa = await build_rag_chain(company, session_id, memory_mode=memory_mode)
+
     # 6. Ask question
-    result = qa.invoke({"question": query})
+    result = await qa.ainvoke({"question": query})
     answer = result["answer"]
 
     # 7. Save to DB
-    store_message(session_id, company, "user", query)
-    store_message(session_id, company, "ai", answer)
+    await store_turn(session_id, company, query, answer)
+    schedule_summary_update(session_id, company, memory_mode)
 
     return answer
 
-def store_message(session_id: str, company: str, role: str, message: str):
-    with Session(engine) as db:
+async def stream_rag_response(company: str, query: str, session_id: str = "default", memory_mode: str = CHAT_MEMORY_MODE):
+    """
+    Yields answer tokens as the LLM produces them. The user/AI turn is only
+    stored once the full answer has been streamed.
+    """
+    answer_llm = get_chat_model(priority="interactive", stage="rag_answer", streaming=True, tags=[ANSWER_TAG])
+    qa = await build_rag_chain(company, session_id, llm=answer_llm, memory_mode=memory_mode)
+
+    tokens = []
+    async for event in qa.astream_events({"question": query}, version="v2"):
+        if event["event"] == "on_chat_model_stream" and ANSWER_TAG in event.get("tags", []):
+            token = event["data"]["chunk"].content
+            if token:
+                tokens.append(token)
+                yield token
+
+    answer = "".join(tokens)
+    await store_turn(session_id, company, query, answer)
+    schedule_summary_update(session_id, company, memory_mode)
+
+async def store_message(session_id: str, company: str, role: str, message: str):
+    async with AsyncSession(get_async_engine()) as db:
         db.add(ChatSession(
             session_id=session_id,
             company=company,
             role=role,
             message=message
         ))
-        db.commit()
+        await db.commit()
 
-def get_memory(session_id: str, company: str):
-    with Session(engine) as db:
-        rows = db.query(ChatSession).filter_by(
-            session_id=session_id,
-            company=company
-        ).order_by(ChatSession.timestamp).all()
+async def store_turn(session_id: str, company: str, query: str, answer: str):
+    """Stores the user question and AI answer in one transaction."""
+    async with AsyncSession(get_async_engine()) as db:
+        db.add_all([
+            ChatSession(session_id=session_id, company=company, role="user", message=query),
+            ChatSession(session_id=session_id, company=company, role="ai", message=answer),
+        ])
+        await db.commit()
+
+async def get_memory(session_id: str, company: str):
+    async with AsyncSession(get_async_engine()) as db:
+        rows = await db.scalars(
+            select(ChatSession).filter_by(
+                session_id=session_id,
+                company=company
+            ).order_by(ChatSession.timestamp)
+        )
         return [(row.role, row.message) for row in rows]
+
+async def get_windowed_memory(session_id: str, company: str, turns: int = CHAT_MEMORY_WINDOW_TURNS):
+    """
+    Returns (summary, [(role, message), ...]) with only the last `turns` turns
+    fetched verbatim; anything older is represented by the rolling summary.
+    """
+    async with AsyncSession(get_async_engine()) as db:
+        summary = await db.get(ChatSessionSummary, (session_id, company))
+        rows = (await db.scalars(
+            select(ChatSession).filter_by(
+                session_id=session_id,
+                company=company
+            ).order_by(ChatSession.id.desc()).limit(turns * 2)
+        )).all()
+        history = [(row.role, row.message) for row in reversed(rows)]
+        return (summary.summary if summary else None), history
+
+def schedule_summary_update(session_id: str, company: str, memory_mode: str = CHAT_MEMORY_MODE):
+    if memory_mode != "window":
+        return
+    task = asyncio.create_task(update_session_summary(session_id, company))
+    _summary_tasks.add(task)
+    task.add_done_callback(_summary_tasks.discard)
+
+async def update_session_summary(session_id: str, company: str, turns: int = CHAT_MEMORY_WINDOW_TURNS):
+    """
+    Folds messages that have just dropped out of the verbatim window into the
+    session's rolling summary. Each turn only summarizes the newly dropped
+    messages, so the cost stays constant however long the session runs.
+    """
+    try:
+        async with AsyncSession(get_async_engine()) as db:
+            summary = await db.get(ChatSessionSummary, (session_id, company))
+            summarized_until = summary.summarized_until_id if summary else 0
+
+            # Newest message that is no longer part of the verbatim window
+            cutoff = await db.scalar(
+                select(ChatSession.id).filter_by(
+                    session_id=session_id,
+                    company=company
+                ).order_by(ChatSession.id.desc()).offset(turns * 2).limit(1)
+            )
+            if cutoff is None or cutoff <= summarized_until:
+                return
+
+            rows = (await db.scalars(
+                select(ChatSession).filter(
+                    ChatSession.session_id == session_id,
+                    ChatSession.company == company,
+                    ChatSession.id > summarized_until,
+                    ChatSession.id <= cutoff,
+                ).order_by(ChatSession.id)
+            )).all()
+
+            new_lines = "\n".join(
+                f"{'Human' if row.role == 'user' else 'AI'}: {row.message}" for row in rows
+            )
+            # Runs after the answer was sent, so it waits behind live chat
+            llm = get_chat_model(priority="batch", stage="session_summary")
+            result = await (SUMMARY_PROMPT | llm).ainvoke({
+                "summary": summary.summary if summary else "",
+                "new_lines": new_lines,
+            })
+
+            # Two overlapping updates may both find no summary row; the upsert lets the one that
+            # summarized further win instead of the second failing on the primary key
+            values = {"summary": result.content, "summarized_until_id": cutoff, "updated_at": datetime.utcnow()}
+            upsert = insert(ChatSessionSummary).values(session_id=session_id, company=company, **values)
+            await db.execute(upsert.on_conflict_do_update(
+                index_elements=[ChatSessionSummary.session_id, ChatSessionSummary.company],
+                set_=values,
+                where=ChatSessionSummary.summarized_until_id < upsert.excluded.summarized_until_id,
+            ))
+            await db.commit()
+    except Exception as e:
+        print(f"⚠️ Failed to update chat summary for session {session_id}: {e}")
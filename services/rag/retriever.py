@@ -1,11 +1,26 @@
 # services/rag/retriever.py
 
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import OpenAIEmbeddings
+from services.rag.retriever_cache import vectorstore_cache
+from services.rag.vector_index import load_vectorstore as load_index
+from utils.openai_clients import get_embedding_model
+
+_embeddings = None
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        # Only chat queries are embedded here
+        _embeddings = get_embedding_model(priority="interactive", stage="query_embedding")
+    return _embeddings
+
+def load_vectorstore(path: str):
+    # Read-only and memory-mapped (FAISS_MMAP), so uvicorn workers share the index pages
+    return load_index(path, get_embeddings())
+
+def get_company_vectorstore(company: str):
+    return vectorstore_cache.get(company, load_vectorstore)
 
 def get_company_retriever(company: str):
-    path = f"vectorstores/{company.lower()}_mentions"
-    embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
-    vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
-    
-    return vectorstore.as_retriever(search_kwargs={"k": 5})
\ No newline at end of file
+    vectorstore = get_company_vectorstore(company)
+
+    return vectorstore.as_retriever(search_kwargs={"k": 5})
@@ -0,0 +1,122 @@
+# services/rag/retriever_cache.py
+
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from config import RETRIEVER_CACHE_MAX_BYTES, FAISS_MMAP
+
+VECTORSTORE_FILES = ("index.faiss", "index.pkl")
+# Companies share this many load locks, so the lock set stays fixed however many are looked up
+LOAD_LOCK_STRIPES = 64
+
+
+def get_vectorstore_path(company: str) -> str:
+    return f"vectorstores/{company.lower()}_mentions"
+
+
+def get_vectorstore_signature(path: str, mmap: bool = FAISS_MMAP):
+    """
+    Returns (mtime_ns, size) pairs for the files backing a saved FAISS store,
+    plus the memory a loaded copy holds on its own: the size of both files, or
+    only the docstore's when the index is memory-mapped, since mapped pages
+    are shared page cache. A changed signature means the store was rebuilt.
+    """
+    signature = []
+    total_bytes = 0
+    for name in VECTORSTORE_FILES:
+        stat = os.stat(os.path.join(path, name))
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+        if not (mmap and name == "index.faiss"):
+            total_bytes += stat.st_size
+    return tuple(signature), total_bytes
+
+
+class VectorstoreCache:
+    """
+    Process-wide LRU cache of loaded FAISS vectorstores, keyed by company.
+
+    Entries are weighed by the size of their files on disk and evicted least
+    recently used first once the total exceeds `max_bytes`. Every lookup
+    re-stats the files, so a rebuilt store is reloaded on the next request.
+    """
+
+    def __init__(self, max_bytes: int = RETRIEVER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # company -> (signature, size, vectorstore)
+        self._lock = threading.Lock()
+        self._load_locks = [threading.Lock() for _ in range(LOAD_LOCK_STRIPES)]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, company: str, loader):
+        """
+        Returns the cached vectorstore for `company`, calling `loader(path)` on a
+        miss or when the files on disk have changed since the last load.
+        """
+        key = company.lower()
+        path = get_vectorstore_path(company)
+
+        load_lock = self._load_locks[zlib.crc32(key.encode("utf-8")) % len(self._load_locks)]
+
+        # One loader per company at a time, so concurrent misses don't all hit disk.
+        # Two companies on the same stripe load one after the other, which only costs time.
+        with load_lock:
+            signature, size = get_vectorstore_signature(path)
+
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] == signature:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                if entry:
+                    del self._entries[key]
+                    self.invalidations += 1
+                self.misses += 1
+
+            vectorstore = loader(path)
+
+            with self._lock:
+                self._entries[key] = (signature, size, vectorstore)
+                self._entries.move_to_end(key)
+                self._evict()
+            return vectorstore
+
+    def _evict(self):
+        # Always keep the most recently used entry, even if it alone exceeds the budget.
+        while len(self._entries) > 1 and self.total_bytes() > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries.values())
+
+    def invalidate(self, company: str = None):
+        with self._lock:
+            if company is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(company.lower(), None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "companies": list(self._entries.keys()),
+                "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+vectorstore_cache = VectorstoreCache()
@@ -0,0 +1,236 @@
+# services/rag/vector_index.py
+
+import math
+import os
+import pickle
+import shutil
+import tempfile
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from config import (
+    FAISS_INDEX_TYPE,
+    FAISS_COMPRESSION,
+    FAISS_FLAT_MAX_DOCS,
+    FAISS_HNSW_MAX_DOCS,
+    FAISS_NPROBE,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_MMAP,
+)
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivf")
+COMPRESSIONS = ("none", "fp16", "pq")
+HNSW_NEIGHBORS = 32
+# Build-time HNSW search list size; the default of 40 left recall@5 around 0.8 in bench_vector_index
+HNSW_EF_CONSTRUCTION = 128
+# Product quantization needs enough vectors to train its 256 centroids per sub-quantizer
+PQ_MIN_DOCS = 10000
+
+
+def choose_index(documents: int, index_type: str = FAISS_INDEX_TYPE, compression: str = FAISS_COMPRESSION):
+    """
+    (index type, compression) for a store of `documents` vectors. "auto" keeps
+    small stores exact (Flat) and switches to HNSW, then IVF, as they grow.
+    Flat stores are never compressed, and PQ only applies to IVF stores large
+    enough to train it; otherwise it falls back to fp16.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {INDEX_TYPES}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown FAISS compression '{compression}', expected one of {COMPRESSIONS}")
+
+    if index_type == "auto":
+        if documents <= FAISS_FLAT_MAX_DOCS:
+            index_type = "flat"
+        elif documents <= FAISS_HNSW_MAX_DOCS:
+            index_type = "hnsw"
+        else:
+            index_type = "ivf"
+
+    if index_type == "flat":
+        compression = "none"
+    elif compression == "pq" and (index_type != "ivf" or documents < PQ_MIN_DOCS):
+        compression = "fp16"
+    return index_type, compression
+
+
+def ivf_lists(documents: int) -> int:
+    # ~4·√n inverted lists, with at least 39 training vectors per list
+    return max(1, min(int(4 * math.sqrt(documents)), documents // 39))
+
+
+def index_spec(index_type: str, compression: str, documents: int, dimension: int) -> str:
+    """faiss.index_factory string for the chosen index."""
+    if index_type == "flat":
+        return "Flat"
+    if compression == "pq" and dimension % 16:
+        compression = "fp16"
+    encoding = {"none": "Flat", "fp16": "SQfp16", "pq": f"PQ{dimension // 16}"}[compression]
+    if index_type == "hnsw":
+        return f"HNSW{HNSW_NEIGHBORS}" if encoding == "Flat" else f"HNSW{HNSW_NEIGHBORS},{encoding}"
+    return f"IVF{ivf_lists(documents)},{encoding}"
+
+
+def describe_index(index):
+    """(index type, compression) of a built index."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw", "fp16" if isinstance(index, faiss.IndexHNSWSQ) else "none"
+    if isinstance(index, faiss.IndexIVF):
+        if isinstance(index, faiss.IndexIVFPQ):
+            return "ivf", "pq"
+        return "ivf", "fp16" if isinstance(index, faiss.IndexIVFScalarQuantizer) else "none"
+    return "flat", "none"
+
+
+def set_search_params(index):
+    """Query-time accuracy/speed knobs; they live on the index object, not in the file."""
+    index_type, _ = describe_index(index)
+    if index_type == "ivf":
+        faiss.extract_index_ivf(index).nprobe = FAISS_NPROBE
+    elif index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+
+
+def needs_rebuild(index, documents: int) -> bool:
+    """
+    Whether a store of `documents` vectors should move to another index: the
+    chosen type or compression changed, or an IVF index's lists no longer fit
+    the corpus (off by 4x either way, after growth or shrinkage).
+    """
+    current = describe_index(index)
+    if current != choose_index(documents):
+        return True
+    if current[0] == "ivf":
+        nlist = faiss.extract_index_ivf(index).nlist
+        return not nlist / 4 <= ivf_lists(documents) <= nlist * 4
+    return False
+
+
+def build_index(vectors: np.ndarray, index_type: str = FAISS_INDEX_TYPE, compression: str = FAISS_COMPRESSION):
+    """Builds (and trains, if it needs it) the chosen index over float32 `vectors`."""
+    documents, dimension = vectors.shape
+    index = faiss.index_factory(dimension, index_spec(*choose_index(documents, index_type, compression), documents, dimension))
+    if describe_index(index)[0] == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    set_search_params(index)
+    return index
+
+
+def build_vectorstore(docs: dict, embeddings, vectors=None, index_type: str = FAISS_INDEX_TYPE, compression: str = FAISS_COMPRESSION):
+    """
+    FAISS store over `docs` ({doc_id: Document}) with the index chosen for its
+    size. `vectors`, in the same order, skips embedding the documents again.
+    """
+    ids = list(docs.keys())
+    texts = [docs[doc_id].page_content for doc_id in ids]
+    if vectors is None:
+        vectors = embeddings.embed_documents(texts)
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    index = build_index(vectors, index_type, compression)
+    docstore = InMemoryDocstore(dict(zip(ids, docs.values())))
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+
+def store_vectors(vectorstore):
+    """
+    ({doc_id: Document}, vectors) of a store, in index order. Vectors come out
+    of uncompressed indexes, which store them exactly; otherwise they are None
+    and callers re-embed the documents (from the embeddings cache).
+    """
+    doc_ids = [vectorstore.index_to_docstore_id[i] for i in range(len(vectorstore.index_to_docstore_id))]
+    docs = {doc_id: vectorstore.docstore.search(doc_id) for doc_id in doc_ids}
+    index = vectorstore.index
+    index_type, compression = describe_index(index)
+    if compression != "none":
+        return docs, None
+    try:
+        if index_type == "ivf":
+            faiss.extract_index_ivf(index).make_direct_map()
+        vectors = index.reconstruct_n(0, index.ntotal)
+    except RuntimeError:
+        vectors = None
+    return docs, vectors
+
+
+def fit_vectorstore(vectorstore, embeddings):
+    """Returns `vectorstore`, or a rebuild of it when its size calls for another index."""
+    if not needs_rebuild(vectorstore.index, vectorstore.index.ntotal):
+        return vectorstore
+    docs, vectors = store_vectors(vectorstore)
+    rebuilt = build_vectorstore(docs, embeddings, vectors)
+    index_type, compression = describe_index(rebuilt.index)
+    print(f"🔁 Rebuilt FAISS index as {index_type} ({compression} compression) for {len(docs)} documents")
+    return rebuilt
+
+
+def delete_documents(vectorstore, ids, embeddings):
+    """Removes `ids` from the store; HNSW can't remove vectors, so it is rebuilt without them."""
+    if describe_index(vectorstore.index)[0] != "hnsw":
+        vectorstore.delete(ids)
+        return vectorstore
+    removed = set(ids)
+    docs, vectors = store_vectors(vectorstore)
+    keep = [i for i, doc_id in enumerate(docs) if doc_id not in removed]
+    return build_vectorstore(
+        {doc_id: doc for doc_id, doc in docs.items() if doc_id not in removed},
+        embeddings,
+        vectors[keep] if vectors is not None else None,
+    )
+
+
+def read_index(path: str, mmap: bool = FAISS_MMAP):
+    """Reads a saved index, memory-mapped read-only with `mmap`, with its search knobs set."""
+    flags = 0
+    if mmap:
+        # Flat and HNSW vectors can only be mapped by FAISS versions with IO_FLAG_MMAP_IFC
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    index = faiss.read_index(path, flags)
+    set_search_params(index)
+    return index
+
+
+def save_vectorstore(vectorstore, path: str):
+    """
+    Writes the store into a temp directory next to `path`, then renames both
+    files into place. API workers memory-map index.faiss; rewriting it in place
+    would truncate the pages they have mapped and crash them with SIGBUS,
+    whereas a rename leaves their old inode alive until they reload.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(path)}-")
+    try:
+        vectorstore.save_local(staging)
+        os.makedirs(path, exist_ok=True)
+        for name in ("index.pkl", "index.faiss"):
+            os.replace(os.path.join(staging, name), os.path.join(path, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_vectorstore(path: str, embeddings, mmap: bool = FAISS_MMAP, attempts: int = 3):
+    """
+    Loads a saved store for querying. With `mmap` the index is memory-mapped
+    read-only, so every worker process shares its pages through the OS page
+    cache instead of holding a private copy; only the docstore is read into
+    memory. Stores loaded this way can't be modified. A load that lands
+    between the two renames of `save_vectorstore` pairs files from different
+    saves; it is detected by their sizes disagreeing and retried.
+    """
+    for attempt in range(attempts):
+        index = read_index(os.path.join(path, "index.faiss"), mmap)
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        if index.ntotal == len(index_to_docstore_id):
+            break
+        if attempt == attempts - 1:
+            raise RuntimeError(f"FAISS store at {path} has {index.ntotal} vectors but {len(index_to_docstore_id)} documents")
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
@@ -1,8 +1,38 @@
+from collections import Counter
+
+from scrapers.raw_store import RawPostStore, get_raw_store
 from services.gather_reddit_mentions import gather_mentions_from_reddit
-from utils.io import save_json
+from utils.io import find_record_file, record_path, write_records
+from utils.prefilter import prefilter_mention, relevance_route
+from config import PREFILTER_ENABLED
+
+def run_info_gathering(company: str, prefilter: bool = PREFILTER_ENABLED, store: RawPostStore = None):
+    """
+    Gathers the company's Reddit mentions into reddit_mentions_<company>, from
+    the scraped file and the raw post `store` (the shared one by default). With
+    `prefilter`, each one is tagged with the local language and relevance
+    signals that decide which enrichment calls it needs.
+    """
+    store = store or get_raw_store()
+    raw_path = find_record_file("data/raw", f"reddit_{company}")
+    duplicates = 0
+    signals = Counter()
+
+    def mentions():
+        nonlocal duplicates
+        for mention in gather_mentions_from_reddit(raw_path, company, store=store):
+            duplicates += "duplicate_of" in mention
+            if prefilter:
+                mention = prefilter_mention(mention, company)
+                signals[mention["language"]] += 1
+                signals[relevance_route(mention["relevance"], mention["text"])] += 1
+            yield mention
 
-def run_info_gathering(company: str):
-    raw_path = f"data/raw/reddit_{company}.json"
-    mentions = gather_mentions_from_reddit(raw_path, company)
-    save_json(mentions, f"reddit_mentions_{company}.json", folder="data/processed")
-    print(f"✅ Gathered {len(mentions)} Reddit mentions for {company}")
\ No newline at end of file
+    count = write_records(mentions(), record_path("data/processed", f"reddit_mentions_{company}"))
+    print(f"✅ Gathered {count} Reddit mentions for {company} ({duplicates} near-duplicates of others)")
+    if prefilter:
+        print(
+            f"🔎 Pre-filter: {signals['en']} English, {signals['passing']} passing mentions, "
+            f"{signals['focus']} to focus, {signals['full']} fully about {company}"
+        )
+    return count
@@ -0,0 +1,129 @@
+import json
+
+from pydantic import ValidationError
+from langsmith import trace
+
+from chains.preprocessing_chain import get_enrichment_chain
+from services.db_setup import setup_tables
+from services.preprocess_mentions import (
+    get_input_file,
+    get_checkpoint_file,
+    get_mention_config,
+    mention_input,
+    clean_result,
+    prepare_checkpoint,
+    iter_pending_mentions,
+    copy_duplicate_results,
+    finalize_checkpoint,
+    is_low_relevance,
+    report_llm_cache,
+)
+from services.populate_mentions import to_mention, insert_mentions_returning, populate_mentions_bulk
+from services.embed_mentions_from_db import VectorstoreAppender, load_mention_documents
+from utils.io import append_jsonl, iter_batches
+from utils.mentions import get_mention_key
+from utils.stage_executor import Stage, run_stages
+from config import (
+    LANGSMITH_PROJECT,
+    PREPROCESS_CONCURRENCY,
+    LLM_CACHE_ENABLED,
+    ENRICHMENT_ENGINE,
+    PIPELINE_QUEUE_SIZE,
+    STREAM_INSERT_BATCH_SIZE,
+    STREAM_EMBED_BATCH_SIZE,
+    STREAM_BATCH_MAX_WAIT,
+)
+
+def stream_mentions(
+    company: str,
+    concurrency: int = PREPROCESS_CONCURRENCY,
+    resume: bool = True,
+    use_cache: bool = LLM_CACHE_ENABLED,
+    engine: str = ENRICHMENT_ENGINE,
+    full_embed: bool = False,
+    chat_model=None,
+    rate_limiter=None,
+    embeddings=None,
+    insert_batch_size: int = STREAM_INSERT_BATCH_SIZE,
+    embed_batch_size: int = STREAM_EMBED_BATCH_SIZE,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+):
+    """
+    Preprocess → populate → embed as one streamed run: each enriched mention is
+    checkpointed, then inserted and embedded in micro-batches while the rest are
+    still being enriched. Returns per-stage stats.
+    """
+    setup_tables()
+
+    input_file = get_input_file(company)
+    done_keys = prepare_checkpoint(company, resume)
+    resumed = bool(done_keys)
+    duplicates = {}
+    chain = get_enrichment_chain(company, engine=engine, chat_model=chat_model, rate_limiter=rate_limiter, use_cache=use_cache)
+    appender = VectorstoreAppender(company, incremental=not full_embed, embeddings=embeddings)
+    failed = []
+
+    def enrich(item):
+        try:
+            result = chain.invoke(mention_input(item), config=get_mention_config(item, concurrency))
+        except Exception as e:
+            failed.append(get_mention_key(item))
+            print(f"❌ Failed to preprocess mention {get_mention_key(item)}: {e}")
+            return None
+        return {**item, **clean_result(result)}
+
+    def insert(batch):
+        valid = []
+        for mention in batch:
+            if is_low_relevance(mention):
+                continue
+            try:
+                valid.append(to_mention(mention, company))
+            except ValidationError as e:
+                print(f"❌ Skipping invalid mention {get_mention_key(mention)}: {e}")
+        return insert_mentions_returning(valid) if valid else []
+
+    def embed(rows):
+        appender.add_rows(rows)
+        return rows
+
+    with open(get_checkpoint_file(company), "a", encoding="utf-8") as checkpoint:
+        def record(mention):
+            append_jsonl(mention, checkpoint)
+            return mention
+
+        stages = [
+            Stage("preprocess", enrich, concurrency=concurrency),
+            Stage("checkpoint", record),
+            Stage("populate", insert, batch_size=insert_batch_size, max_wait=STREAM_BATCH_MAX_WAIT),
+            Stage("embed", embed, batch_size=embed_batch_size, max_wait=STREAM_BATCH_MAX_WAIT),
+        ]
+        with trace(
+            name="stream_mentions",
+            metadata={"company": company, "input_file": input_file, "concurrency": concurrency, "engine": engine},
+            tags=["preprocessing", "population", "embedding", "streaming"],
+            project_name=LANGSMITH_PROJECT,
+        ):
+            stats = run_stages(iter_pending_mentions(input_file, done_keys, duplicates), stages, queue_size=queue_size)
+
+        # Near-duplicates reuse their representative's enrichment once all representatives are done
+        copied = copy_duplicate_results(company, duplicates, checkpoint, engine)
+        for batch in iter_batches(copied, insert_batch_size):
+            embed(insert(batch))
+
+    finalize_checkpoint(company, input_file)
+
+    # A resumed run may have checkpointed mentions that never reached the DB
+    if resumed:
+        populate_mentions_bulk(company)
+    # Picks up rows stored by earlier runs that were never embedded (or all of them after --full-embed)
+    _, removed = appender.sync(load_mention_documents(company))
+    appender.save()
+
+    if failed:
+        print(f"⚠️ {len(failed)} mentions failed preprocessing; rerun to retry them")
+    if use_cache:
+        report_llm_cache()
+    print(f"📊 Stage stats for {company}: {json.dumps(stats)}")
+    print(f"✅ Streamed {stats['populate']['items_out']} new mentions into the DB for {company}; vector store +{appender.added} / -{removed}")
+    return stats
@@ -0,0 +1,28 @@
+from langchain_core.documents import Document
+
+from benchmarks.fake_embeddings import FakeEmbeddings
+from services.rag.vector_index import build_vectorstore, load_vectorstore, save_vectorstore
+
+
+def make_docs(count, start=0):
+    return {
+        f"id{i}": Document(page_content=f"mention {i} about pay", metadata={"i": i})
+        for i in range(start, start + count)
+    }
+
+
+def test_rewriting_a_mapped_store_leaves_loaded_copies_usable(tmp_path):
+    embeddings = FakeEmbeddings(size=32)
+    path = str(tmp_path / "acme_mentions")
+
+    save_vectorstore(build_vectorstore(make_docs(50), embeddings), path)
+    mapped = load_vectorstore(path, embeddings, mmap=True)
+
+    # A rewrite used to truncate the mapped file, and the next search died with SIGBUS
+    save_vectorstore(build_vectorstore(make_docs(400, start=50), embeddings), path)
+
+    assert mapped.similarity_search("mention 7 about pay", k=1)[0].metadata == {"i": 7}
+    reloaded = load_vectorstore(path, embeddings, mmap=True)
+    assert reloaded.index.ntotal == 400
+    assert reloaded.similarity_search("mention 300 about pay", k=1)[0].metadata == {"i": 300}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["acme_mentions"]
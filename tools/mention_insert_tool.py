@@ -18,18 +18,12 @@ def insert_mention(data: Mention) -> str:
             tags=["tool", "db", "insert"]
         ):
             with engine.begin() as conn:
-                result = conn.execute(
-                    text("SELECT 1 FROM mentions WHERE company = :company AND text = :text LIMIT 1"),
-                    {"company": data.company, "text": data.text}
-                ).fetchone()
-
-                if result:
-                    return f"⚠️ Mention for {data.company} already exists. Skipped."
-                
-                conn.execute(
+                inserted = conn.execute(
                     text("""
                         INSERT INTO mentions (company, source, type, sentiment, keywords, text, translated, rating)
                         VALUES (:company, :source, :type, :sentiment, :keywords, :text, :translated, :rating)
+                        ON CONFLICT (company, text_hash) DO NOTHING
+                        RETURNING id
                     """),
                     {
                         "company": data.company,
@@ -41,7 +35,10 @@ def insert_mention(data: Mention) -> str:
                         "translated": data.translated,
                         "rating": data.rating,
                     }
-                )
+                ).fetchone()
+
+                if not inserted:
+                    return f"⚠️ Mention for {data.company} already exists. Skipped."
         return f"✅ Inserted mention for {data.company}"
     except Exception as e:
         logging.error(f"Failed to insert mention for text: {getattr(data, 'text', '[no text]')}. Error: {e}")
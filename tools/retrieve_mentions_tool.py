@@ -1,15 +1,8 @@
 from langchain_core.tools import tool
 from sqlalchemy import text
-from services.db_setup import engine
-
-@tool
-def retrieve_mentions(company: str, type: str = None, sentiment: str = None, keyword: str = None, limit: int = 10) -> list:
-    """
-    Retrieve mentions from the database by filters.
-    Filters include: company (required), type, sentiment, keyword, and result limit.
-    Returns a list of matching records.
-    """
+from services.db_setup import engine, get_async_engine
 
+def build_mentions_query(company: str, type: str = None, sentiment: str = None, keyword: str = None, limit: int = 10):
     query = """
     SELECT company, type, sentiment, keywords, text, translated, rating
     FROM mentions
@@ -26,15 +19,16 @@ def retrieve_mentions(company: str, type: str = None, sentiment: str = None, key
         params["sentiment"] = sentiment
 
     if keyword:
-        query += " AND keywords::text ILIKE :keyword"
-        params["keyword"] = f"%{keyword}%"
+        # Served by the GIN index on keywords; keywords are stored lowercased
+        query += " AND keywords @> jsonb_build_array(CAST(:keyword AS text))"
+        params["keyword"] = keyword.strip().lower()
 
     query += " ORDER BY id DESC LIMIT :limit"
     params["limit"] = limit
 
-    with engine.connect() as conn:
-        results = conn.execute(text(query), params).fetchall()
+    return text(query), params
 
+def unique_by_text(results):
     seen_texts = set()
     unique_results = []
     for row in results:
@@ -43,4 +37,27 @@ def retrieve_mentions(company: str, type: str = None, sentiment: str = None, key
             seen_texts.add(text_content)
             unique_results.append(dict(row._mapping))
 
-    return unique_results
\ No newline at end of file
+    return unique_results
+
+@tool
+def retrieve_mentions(company: str, type: str = None, sentiment: str = None, keyword: str = None, limit: int = 10) -> list:
+    """
+    Retrieve mentions from the database by filters.
+    Filters include: company (required), type, sentiment, keyword, and result limit.
+    Returns a list of matching records.
+    """
+    query, params = build_mentions_query(company, type, sentiment, keyword, limit)
+
+    with engine.connect() as conn:
+        results = conn.execute(query, params).fetchall()
+
+    return unique_by_text(results)
+
+async def aretrieve_mentions(company: str, type: str = None, sentiment: str = None, keyword: str = None, limit: int = 10) -> list:
+    """Async variant of `retrieve_mentions` for the API."""
+    query, params = build_mentions_query(company, type, sentiment, keyword, limit)
+
+    async with get_async_engine().connect() as conn:
+        results = (await conn.execute(query, params)).fetchall()
+
+    return unique_by_text(results)
@@ -1,9 +1,146 @@
-import os
+import gzip
 import json
+import os
+
+from config import DATA_COMPRESSION
+
+# Formats a stage's records may be stored in; .json is the original whole-list format
+RECORD_EXTENSIONS = (".jsonl", ".jsonl.gz", ".json")
 
 def save_json(data, filename, folder="data/raw"):
     os.makedirs(folder, exist_ok=True)
     path = os.path.join(folder, filename)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"✅ Saved {len(data)} items to {path}")
\ No newline at end of file
+    print(f"✅ Saved {len(data)} items to {path}")
+
+def open_text(path, mode="r", compress=None):
+    """Opens `path` as UTF-8 text, through gzip if it ends in .gz (or `compress` is set)."""
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def append_jsonl(record, f):
+    """Writes one record as a JSON line and flushes it, so it survives a crash."""
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+
+def truncate_partial_line(path, chunk_size=65536):
+    """
+    Cuts an uncompressed JSONL file back to its last complete line, dropping
+    what a crash left half-written, so appended records start on a line of
+    their own. A last record that is whole but lacks its newline gets one
+    instead. Returns the number of bytes removed.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end == size:
+            return 0
+        f.seek(end)
+        try:
+            json.loads(f.read())
+            f.write(b"\n")
+            return 0
+        except ValueError:
+            f.truncate(end)
+    return size - end
+
+def read_jsonl(path):
+    """Yields records from a JSONL file, skipping a line cut short by a crash."""
+    if not os.path.exists(path):
+        return
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping truncated line in {path}")
+
+def index_jsonl(path, key):
+    """
+    {key(record): byte offset} for an uncompressed JSONL file, keeping each
+    key's first record, so records can be read back in any order with
+    `read_jsonl_at` without holding them in memory.
+    """
+    offsets = {}
+    if not os.path.exists(path):
+        return offsets
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            try:
+                offsets.setdefault(key(json.loads(line)), offset)
+            except json.JSONDecodeError:
+                pass
+            offset += len(line)
+    return offsets
+
+def read_jsonl_at(f, offset):
+    """The record starting at `offset` in a JSONL file opened in binary mode."""
+    f.seek(offset)
+    return json.loads(f.readline())
+
+def record_path(folder, stem, compress=DATA_COMPRESSION):
+    """Where a stage writes `stem`: <folder>/<stem>.jsonl, or .jsonl.gz when compressing."""
+    return os.path.join(folder, f"{stem}.jsonl.gz" if compress else f"{stem}.jsonl")
+
+def find_record_file(folder, stem):
+    """The most recently written file for `stem` in any record format, or None."""
+    existing = [
+        path for path in (os.path.join(folder, stem + ext) for ext in RECORD_EXTENSIONS)
+        if os.path.exists(path)
+    ]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+def iter_records(path):
+    """Yields records from a JSONL(.gz) file, or from a legacy .json list."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        yield from read_jsonl(path)
+
+def write_records(records, path):
+    """
+    Streams `records` to a JSONL(.gz) file and returns how many were written.
+    The file is written under a temporary name and renamed when complete, so
+    `records` may lazily read the file being replaced.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    count = 0
+    with open_text(tmp_path, "w", compress=path.endswith(".gz")) as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    print(f"✅ Saved {count} items to {path}")
+    return count
+
+def iter_batches(iterable, size):
+    """Yields lists of up to `size` items from `iterable`."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from utils.metrics import record_cache_lookup
+from config import LLM_CACHE_PATH, LLM_CACHE_TTL_DAYS, LLM_CACHE_MAX_ENTRIES
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed cache of LLM completions keyed by (model, prompt template hash,
+    rendered prompt). Entries expire after `ttl_days` and the least recently used
+    ones are dropped once there are more than `max_entries`.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_days: float = LLM_CACHE_TTL_DAYS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.max_entries = max_entries
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                stage TEXT,
+                model TEXT,
+                template_hash TEXT,
+                response TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, template_hash: str, rendered: str) -> str:
+        return hash_text(f"{model}\x00{template_hash}\x00{rendered}")
+
+    def get(self, stage: str, key: str):
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self.conn.commit()
+                row = None
+            if row is None:
+                self.misses[stage] += 1
+                record_cache_lookup(stage, hit=False)
+                return None
+            self.conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits[stage] += 1
+            record_cache_lookup(stage, hit=True)
+            return row[0]
+
+    def put(self, stage: str, key: str, model: str, template_hash: str, response: str):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, model, template_hash, response, now, now),
+            )
+            self.conn.commit()
+            self._writes += 1
+            # Trimming needs a COUNT(*), so only check every few hundred writes.
+            if self.max_entries and self._writes % 500 == 0:
+                self._trim()
+
+    def _trim(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM llm_responses WHERE key IN "
+                "(SELECT key FROM llm_responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            self.conn.commit()
+
+    def prune_stale_templates(self, stage: str, template_hash: str) -> int:
+        """Drops a stage's entries that were produced by a different prompt template."""
+        with self._lock:
+            deleted = self.conn.execute(
+                "DELETE FROM llm_responses WHERE stage = ? AND template_hash != ?", (stage, template_hash)
+            ).rowcount
+            self.conn.commit()
+            return deleted
+
+    def clear(self, stage: str = None) -> int:
+        with self._lock:
+            if stage:
+                deleted = self.conn.execute("DELETE FROM llm_responses WHERE stage = ?", (stage,)).rowcount
+            else:
+                deleted = self.conn.execute("DELETE FROM llm_responses").rowcount
+            self.conn.commit()
+            return deleted
+
+    def stats(self) -> dict:
+        stages = sorted(set(self.hits) | set(self.misses))
+        return {
+            stage: {
+                "hits": self.hits[stage],
+                "misses": self.misses[stage],
+                "hit_rate": self.hits[stage] / (self.hits[stage] + self.misses[stage]),
+            }
+            for stage in stages
+        }
+
+
+def with_cache(model, cache: LLMResponseCache, stage: str, template: str, model_name: str):
+    """
+    Wraps a chat model runnable so identical rendered prompts for the same
+    model and template are answered from `cache` instead of the API.
+    """
+    template_hash = hash_text(template)
+
+    def call(prompt_value, config):
+        rendered = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+        key = cache.make_key(model_name, template_hash, rendered)
+        cached = cache.get(stage, key)
+        if cached is not None:
+            return AIMessage(content=cached)
+        message = model.invoke(prompt_value, config=config)
+        cache.put(stage, key, model_name, template_hash, message.content)
+        return message
+
+    return RunnableLambda(call, name=f"Cached{stage.title()}")
+
+
+_default_cache = None
+
+def get_llm_cache() -> LLMResponseCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache()
+    return _default_cache
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2 or sys.argv[1] != "--clear":
+        print("Usage: python -m utils.llm_cache --clear [stage]")
+    else:
+        stage = sys.argv[2] if len(sys.argv) > 2 else None
+        print(f"🧹 Removed {get_llm_cache().clear(stage)} cached responses")
@@ -0,0 +1,8 @@
+import hashlib
+
+
+def get_mention_key(item):
+    """Use ID if available, otherwise use hash of text."""
+    if item.get("id"):
+        return str(item["id"])
+    return hashlib.md5(item["text"].encode("utf-8")).hexdigest()
@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+from config import PROMETHEUS_MULTIPROC_DIR
+
+# prometheus_client picks per-process or shared-file storage when it is imported, so the
+# directory is set up first; spawned pipeline workers inherit it through the environment
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.abspath(PROMETHEUS_MULTIPROC_DIR)
+else:
+    # An empty value still switches prometheus_client to multiprocess mode
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event  # noqa: E402
+
+STAGE_DURATION = Histogram(
+    "varys_pipeline_stage_duration_seconds", "Wall time of a pipeline stage", ["stage"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+STAGE_ITEMS = Counter("varys_pipeline_stage_items", "Items handled by a pipeline stage", ["stage"])
+PIPELINE_RUNS = Counter("varys_pipeline_runs", "Finished pipeline runs", ["status"])
+LLM_CALL_DURATION = Histogram(
+    "varys_llm_call_duration_seconds", "Latency of LLM calls that reached the API", ["stage"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+LLM_TOKENS = Counter("varys_llm_tokens", "LLM tokens used", ["stage", "kind"])
+LLM_CACHE_REQUESTS = Counter("varys_llm_cache_requests", "LLM response cache lookups", ["stage", "result"])
+LLM_CALLS_SAVED = Counter("varys_llm_calls_saved", "LLM calls skipped by the pre-filter or reused across near-duplicates", ["reason"])
+DB_QUERY_DURATION = Histogram(
+    "varys_db_query_duration_seconds", "Database statement latency", ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "varys_http_request_duration_seconds", "API request latency", ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+class Tally:
+    """
+    Process-wide running totals mirrored from the Prometheus counters, so a
+    pipeline run can record how much it used (as the difference between two
+    snapshots) in pipeline_runs.
+    """
+
+    def __init__(self):
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: float = 1):
+        with self._lock:
+            self._values[key] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def delta(before: dict, after: dict) -> dict:
+        return {key: round(value - before.get(key, 0), 3) for key, value in after.items() if value != before.get(key, 0)}
+
+
+tally = Tally()
+
+
+def record_cache_lookup(stage: str, hit: bool):
+    result = "hit" if hit else "miss"
+    LLM_CACHE_REQUESTS.labels(stage, result).inc()
+    tally.add(f"llm_cache_{result}s")
+
+
+def record_llm_call(stage: str, message, seconds: float):
+    LLM_CALL_DURATION.labels(stage).observe(seconds)
+    tally.add("llm_calls")
+    usage = getattr(message, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(stage, kind.replace("_tokens", "")).inc(usage[kind])
+            tally.add(f"llm_{kind}", usage[kind])
+
+
+def record_embedding_call(stage: str, tokens: int, seconds: float):
+    """Embedding requests report no usage, so `tokens` is the estimate the rate limiter charged."""
+    LLM_CALL_DURATION.labels(stage).observe(seconds)
+    tally.add("embedding_calls")
+    if tokens:
+        LLM_TOKENS.labels(stage, "input").inc(tokens)
+        tally.add("embedding_tokens", tokens)
+
+
+def record_llm_calls_saved(reason: str, calls: int):
+    if calls:
+        LLM_CALLS_SAVED.labels(reason).inc(calls)
+        tally.add(f"llm_calls_saved_{reason}", calls)
+
+
+def record_stage(stage: str, seconds: float, items: int = 0):
+    STAGE_DURATION.labels(stage).observe(seconds)
+    if items:
+        STAGE_ITEMS.labels(stage).inc(items)
+
+
+def with_llm_metrics(model, stage: str):
+    """Wraps a chat model runnable to record call latency and token usage under `stage`."""
+
+    def call(prompt_value, config):
+        start = time.perf_counter()
+        message = model.invoke(prompt_value, config=config)
+        record_llm_call(stage, message, time.perf_counter() - start)
+        return message
+
+    return RunnableLambda(call, name=f"Metered{stage.title()}")
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Records the latency and token usage of every request a chat model makes
+    under `stage`. Attached by the model factories, so agents and chains built
+    on them are counted without wrapping the model.
+    """
+
+    # Time the request itself, not a hop through the executor on async calls
+    run_inline = True
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is None:
+            return
+        generations = response.generations[0] if response.generations else []
+        message = getattr(generations[0], "message", None) if generations else None
+        record_llm_call(self.stage, message, time.perf_counter() - start)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+
+
+def instrument_engine(engine, name: str):
+    """Times every statement run through a SQLAlchemy engine (sync, or an async engine's sync_engine)."""
+
+    # The start time lives on the statement's execution context, so a statement that fails
+    # (and never reaches after_cursor_execute) leaves nothing behind on the pooled connection
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        seconds = time.perf_counter() - start
+        DB_QUERY_DURATION.labels(name).observe(seconds)
+        tally.add("db_queries")
+        tally.add("db_seconds", seconds)
+
+
+def clear_stale_metrics():
+    """
+    Removes metric files left in PROMETHEUS_MULTIPROC_DIR by processes that are
+    no longer running (earlier API runs, workers, CLI pipeline runs), so /metrics
+    starts from zero with each API start instead of summing every past run.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for name in os.listdir(directory):
+        pid = name.rsplit(".", 1)[0].rsplit("_", 1)[-1]
+        if not name.endswith(".db") or not pid.isdigit() or _process_alive(int(pid)):
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def mark_process_dead(pid: int):
+    """Drops the live state of an exited worker process from the shared metrics."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def render_metrics():
+    """
+    Prometheus exposition of the metrics. With PROMETHEUS_MULTIPROC_DIR set (the
+    default), the pipeline worker processes write their metrics there and they
+    are aggregated into the API's /metrics.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,98 @@
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+_LOW_29 = np.uint64((1 << 29) - 1)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """
+    Word `size`-grams of `text`, lowercased with punctuation and quote markers
+    dropped, so reformatted or lightly edited copies share most of them.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _mul_mod_mersenne(a: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    a * x mod 2**61 - 1 for a < 2**61 and x < 2**32 (broadcast), without
+    overflowing uint64: a is split into 32-bit limbs, and the high product
+    is shifted up by 32 bits modulo p using 2**61 = 1 (mod p).
+    """
+    high = (a >> np.uint64(32)) * x  # < 2**61
+    high = (high >> np.uint64(29)) + ((high & _LOW_29) << np.uint64(32))  # high * 2**32 mod p, < 2**62
+    low = (a & MAX_HASH) * x % MERSENNE_PRIME  # product < 2**64
+    return (low + high) % MERSENNE_PRIME
+
+
+class MinHasher:
+    """MinHash signatures: `num_perm` values whose agreement rate estimates Jaccard similarity."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)), dtype=np.uint64
+        )
+        # Universal hashing (a*x + b) mod p, one row per permutation
+        return np.bitwise_and((_mul_mod_mersenne(self.a, hashes) + self.b) % MERSENNE_PRIME, MAX_HASH).min(axis=1)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    return float(np.mean(first == second))
+
+
+class NearDuplicateIndex:
+    """
+    Groups near-identical texts. Signatures are split into `bands`; texts that
+    agree on every value of any band land in the same bucket and become
+    candidates, so a lookup only compares against a handful of earlier texts
+    instead of all of them. Candidates are confirmed on the full signature.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 128, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.buckets = defaultdict(list)
+        self.signatures = {}
+
+    def _bands(self, signature):
+        for start in range(0, len(signature), self.rows):
+            yield start, signature[start:start + self.rows].tobytes()
+
+    def find_or_add(self, key: str, text: str):
+        """
+        Returns the key of an earlier text that `text` nearly duplicates, or
+        None after adding it under `key` as the representative of a new group.
+        """
+        signature = self.hasher.signature(text)
+
+        candidates = {other for band in self._bands(signature) for other in self.buckets.get(band, ())}
+        best, best_score = None, self.threshold
+        for other in candidates:
+            score = similarity(signature, self.signatures[other])
+            if score >= best_score:
+                best, best_score = other, score
+        if best is not None:
+            return best
+
+        # Only representatives are indexed, so groups never chain through intermediate texts
+        self.signatures[key] = signature
+        for band in self._bands(signature):
+            self.buckets[band].append(key)
+        return None
@@ -0,0 +1,101 @@
+import asyncio
+import math
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_openai import ChatOpenAI
+
+from utils.metrics import LLMMetricsCallback, record_embedding_call
+from utils.rate_limiter import chat_rate_limiter, embedding_rate_limiter, estimate_tokens
+from config import LLM_MODEL, EMBEDDING_MODEL
+
+# Updated import to address LangChain deprecation warning
+try:
+    from langchain_openai import OpenAIEmbeddings
+except ImportError:
+    from langchain_community.embeddings import OpenAIEmbeddings
+
+
+class RateLimitCallback(BaseCallbackHandler):
+    """
+    Takes a slot from `limiter` before each chat model request. LangChain runs
+    callbacks before the request is sent (awaiting them on async calls), so this
+    paces agents and chains whose model can't be wrapped in a runnable.
+    """
+
+    def __init__(self, limiter, priority: str):
+        self.limiter = limiter
+        self.priority = priority
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        text = "".join(str(m.content) for batch in messages for m in batch)
+        self.limiter.acquire(estimate_tokens(text), self.priority, requests=len(messages))
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.limiter.acquire(estimate_tokens("".join(prompts)), self.priority, requests=len(prompts))
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Embeddings that take from `limiter` per API request (`chunk_size` texts each)
+    and record their latency and estimated tokens under `stage`.
+    """
+
+    def __init__(self, embeddings, limiter, priority: str, stage: str = "embeddings", chunk_size: int = 1000):
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.priority = priority
+        self.stage = stage
+        self.chunk_size = getattr(embeddings, "chunk_size", None) or chunk_size
+
+    def _acquire(self, texts) -> int:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        self.limiter.acquire(tokens, self.priority, requests=max(1, math.ceil(len(texts) / self.chunk_size)))
+        return tokens
+
+    def embed_documents(self, texts):
+        tokens = self._acquire(texts)
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        record_embedding_call(self.stage, tokens, time.perf_counter() - start)
+        return vectors
+
+    def embed_query(self, text):
+        tokens = self._acquire([text])
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(text)
+        record_embedding_call(self.stage, tokens, time.perf_counter() - start)
+        return vector
+
+    async def aembed_documents(self, texts):
+        tokens = await asyncio.to_thread(self._acquire, texts)
+        start = time.perf_counter()
+        vectors = await self.embeddings.aembed_documents(texts)
+        record_embedding_call(self.stage, tokens, time.perf_counter() - start)
+        return vectors
+
+    async def aembed_query(self, text):
+        tokens = await asyncio.to_thread(self._acquire, [text])
+        start = time.perf_counter()
+        vector = await self.embeddings.aembed_query(text)
+        record_embedding_call(self.stage, tokens, time.perf_counter() - start)
+        return vector
+
+
+def get_chat_model(priority: str = "batch", stage: str = "chat", **kwargs):
+    """
+    ChatOpenAI drawing from the shared chat quota. Use "interactive" for
+    user-facing requests and "batch" for background work; latency and token
+    usage are recorded under `stage`.
+    """
+    callbacks = [RateLimitCallback(chat_rate_limiter, priority), LLMMetricsCallback(stage)] + kwargs.pop("callbacks", [])
+    if kwargs.get("streaming"):
+        # Streamed responses only report token usage when asked to
+        kwargs.setdefault("stream_usage", True)
+    return ChatOpenAI(model=kwargs.pop("model", LLM_MODEL), temperature=kwargs.pop("temperature", 0), callbacks=callbacks, **kwargs)
+
+
+def get_embedding_model(priority: str = "batch", model: str = EMBEDDING_MODEL, stage: str = "embeddings"):
+    """OpenAIEmbeddings drawing from the shared embeddings quota, metered under `stage`."""
+    return RateLimitedEmbeddings(OpenAIEmbeddings(model=model), embedding_rate_limiter, priority, stage)
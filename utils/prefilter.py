@@ -0,0 +1,102 @@
+import re
+
+from config import PREFILTER_MIN_RELEVANCE, PREFILTER_FOCUS_RELEVANCE
+
+_WORD_RE = re.compile(r"[^\W\d_]+|\d+")
+_SENTENCE_RE = re.compile(r"[^.!?\n]+")
+_DEVANAGARI_RE = re.compile(r"[\u0900-\u097F]")
+# What the preprocess prompt strips: escape sequences, line breaks, tabs, markdown and repeated spaces
+_FORMATTING_RE = re.compile(r"\\[ntr\"']|[\n\t\r*#`>|~_]|\]\(|\s{2,}")
+
+# Mentions shorter than this are enriched whole rather than focused
+FOCUS_MIN_WORDS = 40
+
+# Romanized Nepali words that don't occur in English text, so one of them means the text needs translating
+NEPALI_MARKERS = {
+    "cha", "chha", "xa", "chaina", "chhaina", "xaina", "thiyo", "thyo", "thiena", "ramro", "naramro",
+    "dherai", "ekdam", "khasai", "garna", "garne", "garnu", "gareko", "garera", "garchha", "garcha",
+    "huncha", "hunchha", "hunxa", "hunna", "hudaina", "bhayo", "vayo", "bhane", "vane", "bhanda",
+    "vanda", "bhanne", "kasto", "kati", "kina", "kunai", "tara", "pani", "tyo", "lai", "malai",
+    "hamro", "timro", "tapai", "sabai", "arko", "ahile", "pahile", "ani", "ko", "talab", "sathi",
+}
+
+# Words that tie a sentence naming the company to something said about it
+CONTEXT_TERMS = {
+    "salary", "salaries", "pay", "paid", "package", "benefits", "bonus", "intern", "internship",
+    "interview", "interviews", "hiring", "hired", "hire", "applied", "apply", "job", "jobs", "offer",
+    "work", "working", "worked", "works", "joined", "join", "left", "resigned", "layoff", "layoffs",
+    "culture", "environment",
+    "management", "manager", "managers", "team", "teams", "hr", "boss", "senior", "junior", "office",
+    "growth", "career", "learning", "experience", "project", "projects", "client", "clients",
+    "good", "bad", "great", "best", "worst", "toxic", "recommend", "love", "hate", "better", "worse",
+    "review", "reviews", "rating", "leave", "overtime", "remote", "promotion", "appraisal",
+}
+
+
+def detect_language(text: str) -> str:
+    """
+    "en" for English text, "ne" when it has Devanagari or romanized Nepali,
+    "other" for any other non-Latin script. Errs towards "ne", since a missed
+    translation changes the output while an extra one only costs a call.
+    """
+    if _DEVANAGARI_RE.search(text):
+        return "ne"
+    if any(ch.isalpha() and ord(ch) > 0x024F for ch in text):
+        return "other"
+    words = _WORD_RE.findall(text.lower())
+    return "ne" if any(word in NEPALI_MARKERS for word in words) else "en"
+
+
+def needs_cleaning(text: str) -> bool:
+    """Whether the preprocess prompt would change `text` (it only strips escapes and formatting)."""
+    return text != text.strip() or bool(_FORMATTING_RE.search(text))
+
+
+def relevance_score(text: str, company: str) -> float:
+    """
+    0-1 estimate of how much `text` is about `company`: the share of its words
+    in sentences naming the company, how often it is named, and whether those
+    sentences say something about it (pay, culture, opinions, ...) rather than
+    just listing it.
+    """
+    company_lower = company.lower()
+    sentences = _SENTENCE_RE.findall(text.lower())
+    total_words = sum(len(_WORD_RE.findall(sentence)) for sentence in sentences)
+    if not total_words:
+        return 0.0
+
+    company_words = 0
+    context_hits = 0
+    for sentence in sentences:
+        if company_lower in sentence:
+            words = _WORD_RE.findall(sentence)
+            company_words += len(words)
+            context_hits += sum(word in CONTEXT_TERMS for word in words)
+
+    focus = company_words / total_words
+    mentions = min(text.lower().count(company_lower), 3) / 3
+    context = min(context_hits, 3) / 3
+    return round(0.5 * focus + 0.2 * mentions + 0.3 * context, 3)
+
+
+def relevance_route(relevance: float, text: str) -> str:
+    """
+    "passing" mentions only name the company and are not worth enriching,
+    "focus" mentions are narrowed to the parts about the company first, and
+    "full" mentions are enriched as they are. Short texts are never focused;
+    there's too little else in them for narrowing to change the result.
+    """
+    if relevance < PREFILTER_MIN_RELEVANCE:
+        return "passing"
+    if relevance < PREFILTER_FOCUS_RELEVANCE and len(text.split()) >= FOCUS_MIN_WORDS:
+        return "focus"
+    return "full"
+
+
+def prefilter_mention(item: dict, company: str) -> dict:
+    """Adds the local `language` and `relevance` signals enrichment branches on."""
+    return {
+        **item,
+        "language": detect_language(item["text"]),
+        "relevance": relevance_score(item["text"], company),
+    }
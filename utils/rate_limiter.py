@@ -0,0 +1,188 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_MAX_RETRIES,
+    LLM_RATE_LIMIT_PATH,
+    LLM_BATCH_RESERVE,
+    EMBEDDING_REQUESTS_PER_MINUTE,
+    EMBEDDING_TOKENS_PER_MINUTE,
+)
+
+# Share of each bucket a priority class must leave untouched: batch work stops
+# short of the last LLM_BATCH_RESERVE of the quota, which stays free for chat.
+PRIORITY_RESERVES = {"interactive": 0.0, "batch": LLM_BATCH_RESERVE}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for TPM budgeting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, tokens: float = None, updated: float = None):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute if tokens is None else tokens
+        self.updated = time.monotonic() if updated is None else updated
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now, reserve: float = 0.0):
+        """
+        Seconds until `amount` is available without dipping into the `reserve`
+        fraction of the bucket; 0 means it can be taken now.
+        """
+        self._refill(now)
+        floor = self.capacity * reserve
+        # Requests larger than the usable part of the bucket are let through once it is full.
+        amount = min(amount, self.capacity - floor)
+        if self.tokens - amount >= floor:
+            return 0.0
+        return (amount + floor - self.tokens) / self.rate
+
+    def take(self, amount, reserve: float = 0.0):
+        self.tokens -= min(amount, self.capacity * (1 - reserve))
+
+
+class RateLimiter:
+    """
+    Thread-safe requests-per-minute / tokens-per-minute limiter.
+    A limit of 0 (or None) disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: int = None, tokens_per_minute: int = None):
+        self.buckets = {}
+        if requests_per_minute:
+            self.buckets["requests"] = TokenBucket(requests_per_minute)
+        if tokens_per_minute:
+            self.buckets["tokens"] = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1, priority: str = "batch", requests: int = 1):
+        if not self.buckets:
+            return
+        wanted = {"requests": requests, "tokens": tokens}
+        reserve = PRIORITY_RESERVES[priority]
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    bucket.wait_time(wanted[name], now, reserve)
+                    for name, bucket in self.buckets.items()
+                )
+                if wait == 0:
+                    for name, bucket in self.buckets.items():
+                        bucket.take(wanted[name], reserve)
+                    return
+            time.sleep(wait)
+
+
+class SharedRateLimiter:
+    """
+    RateLimiter whose buckets live in a SQLite file, so every process on the
+    host (API, pipeline workers, CLI runs) draws from the same OpenAI quota.
+    Buckets are namespaced by `name`, e.g. separate chat and embedding quotas.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int = None, tokens_per_minute: int = None, path: str = LLM_RATE_LIMIT_PATH):
+        self.name = name
+        self.path = path
+        self.limits = {}
+        if requests_per_minute:
+            self.limits["requests"] = requests_per_minute
+        if tokens_per_minute:
+            self.limits["tokens"] = tokens_per_minute
+        # sqlite connections can't be shared between threads; each thread opens its own
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            self._local.conn = conn
+        return conn
+
+    def _try_acquire(self, wanted: dict, reserve: float) -> float:
+        """Takes `wanted` from every bucket if all have it and returns 0, else the seconds to wait."""
+        conn = self._connection()
+        now = time.time()
+        # BEGIN IMMEDIATE holds the write lock, so the read-refill-take below is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            buckets = {}
+            for kind, per_minute in self.limits.items():
+                key = f"{self.name}:{kind}"
+                row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE name = ?", (key,)).fetchone()
+                buckets[key] = (TokenBucket(per_minute, *(row or (None, now))), wanted[kind])
+            wait = max(bucket.wait_time(amount, now, reserve) for bucket, amount in buckets.values())
+            if wait == 0:
+                for bucket, amount in buckets.values():
+                    bucket.take(amount, reserve)
+            conn.executemany(
+                "INSERT OR REPLACE INTO rate_buckets VALUES (?, ?, ?)",
+                [(key, bucket.tokens, bucket.updated) for key, (bucket, _) in buckets.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, tokens: int = 1, priority: str = "batch", requests: int = 1):
+        if not self.limits:
+            return
+        wanted = {"requests": requests, "tokens": tokens}
+        reserve = PRIORITY_RESERVES[priority]
+        while True:
+            wait = self._try_acquire(wanted, reserve)
+            if wait == 0:
+                return
+            # Jitter keeps waiting processes from retrying in lockstep
+            time.sleep(wait + random.uniform(0, 0.05))
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ in ("RateLimitError", "RateLimitExceeded")
+
+
+def with_rate_limit(llm, limiter: RateLimiter, max_retries: int = LLM_MAX_RETRIES, base_delay: float = 1.0, priority: str = "batch"):
+    """
+    Wraps a chat model so every call first takes a slot from `limiter`, and 429
+    responses are retried with exponential backoff and jitter.
+    """
+
+    def call(prompt_value, config):
+        tokens = estimate_tokens(prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value))
+        for attempt in range(max_retries + 1):
+            limiter.acquire(tokens, priority)
+            try:
+                return llm.invoke(prompt_value, config=config)
+            except Exception as e:
+                if attempt == max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = base_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+
+    return RunnableLambda(call, name=f"RateLimited{getattr(llm, 'name', None) or type(llm).__name__}")
+
+
+chat_rate_limiter = SharedRateLimiter("chat", LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+embedding_rate_limiter = SharedRateLimiter("embeddings", EMBEDDING_REQUESTS_PER_MINUTE, EMBEDDING_TOKENS_PER_MINUTE)
+# The batch chains' limiter is the shared chat quota
+llm_rate_limiter = chat_rate_limiter
@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+
+from config import PIPELINE_QUEUE_SIZE
+
+_DONE = object()
+_POLL = 0.1
+
+
+class StageFailed(Exception):
+    pass
+
+
+class Stage:
+    """
+    One step of a streamed pipeline, run by `concurrency` worker threads.
+
+    Without `batch_size`, `fn(item)` is called per item and returns the item to
+    pass downstream (None drops it). With `batch_size`, `fn(batch)` is called on
+    lists of up to `batch_size` items and returns an iterable of items to pass
+    on; a partial batch is flushed once nothing has arrived for `max_wait` seconds.
+    """
+
+    def __init__(self, name: str, fn, concurrency: int = 1, batch_size: int = None, max_wait: float = 1.0):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def stats(self):
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "concurrency": self.concurrency,
+        }
+
+
+def run_stages(source, stages, queue_size: int = PIPELINE_QUEUE_SIZE):
+    """
+    Streams items from the `source` iterable through `stages` in order. Stages
+    are connected by queues holding at most `queue_size` items, so a slow stage
+    makes the ones before it wait instead of buffering the whole corpus. The
+    first exception in any stage stops the run and is raised as `StageFailed`.
+    Returns {stage name: stats}.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fail(name, error):
+        errors.append((name, error))
+        stop.set()
+
+    def feed():
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+        except Exception as e:
+            fail("source", e)
+            return
+        for _ in range(stages[0].concurrency):
+            put(queues[0], _DONE)
+
+    remaining = [stage.concurrency for stage in stages]
+    remaining_lock = threading.Lock()
+
+    def finish_worker(index):
+        # The last worker of a stage tells every worker of the next one that input has ended
+        with remaining_lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last and index + 1 < len(stages):
+            for _ in range(stages[index + 1].concurrency):
+                put(queues[index + 1], _DONE)
+
+    def emit(index, stage, outputs):
+        for output in outputs:
+            with stage._lock:
+                stage.items_out += 1
+            if index + 1 < len(stages) and not put(queues[index + 1], output):
+                return
+
+    def call(stage, payload, size):
+        start = time.perf_counter()
+        result = stage.fn(payload)
+        with stage._lock:
+            stage.items_in += size
+            stage.busy_seconds += time.perf_counter() - start
+        return result
+
+    def work(index):
+        stage = stages[index]
+        inbox = queues[index]
+        batch = []
+        try:
+            while not stop.is_set():
+                timeout = stage.max_wait if stage.batch_size and batch else _POLL
+                try:
+                    item = inbox.get(timeout=timeout)
+                except queue.Empty:
+                    if batch:
+                        emit(index, stage, call(stage, batch, len(batch)) or [])
+                        batch = []
+                    continue
+
+                if item is _DONE:
+                    if batch:
+                        emit(index, stage, call(stage, batch, len(batch)) or [])
+                    break
+
+                if stage.batch_size:
+                    batch.append(item)
+                    if len(batch) >= stage.batch_size:
+                        emit(index, stage, call(stage, batch, len(batch)) or [])
+                        batch = []
+                else:
+                    output = call(stage, item, 1)
+                    if output is not None:
+                        emit(index, stage, [output])
+        except Exception as e:
+            fail(stage.name, e)
+        finally:
+            finish_worker(index)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for index, stage in enumerate(stages):
+        threads += [threading.Thread(target=work, args=(index,), daemon=True) for _ in range(stage.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        name, error = errors[0]
+        raise StageFailed(f"Stage '{name}' failed: {error}") from error
+    return {stage.name: stage.stats() for stage in stages}
@@ -0,0 +1,58 @@
+import functools
+import inspect
+import threading
+import time
+
+
+def ttl_cache(seconds: float, maxsize: int = 1024):
+    """
+    Memoizes a function's results per positional/keyword arguments for `seconds`.
+    Works for both plain and async functions. Used for short-lived API response
+    caching; `fn.cache_clear()` empties it.
+    """
+
+    def decorator(fn):
+        entries = {}
+        lock = threading.Lock()
+
+        def lookup(key):
+            with lock:
+                entry = entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return True, entry[1]
+            return False, None
+
+        def store(key, value):
+            now = time.monotonic()
+            with lock:
+                if len(entries) >= maxsize:
+                    # Drop expired entries first, then the oldest if still full
+                    for k in [k for k, (expires, _) in entries.items() if expires <= now]:
+                        del entries[k]
+                    if len(entries) >= maxsize:
+                        del entries[min(entries, key=lambda k: entries[k][0])]
+                entries[key] = (now + seconds, value)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                key = (args, tuple(sorted(kwargs.items())))
+                found, value = lookup(key)
+                if not found:
+                    value = await fn(*args, **kwargs)
+                    store(key, value)
+                return value
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = (args, tuple(sorted(kwargs.items())))
+                found, value = lookup(key)
+                if not found:
+                    value = fn(*args, **kwargs)
+                    store(key, value)
+                return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
@@ -168,6 +168,63 @@ export const sendChatMessage = async (message, sessionId, company) => {
   }
 };
 
+// Stream a chat answer token by token (Server-Sent Events from /chat/stream)
+export const streamChatMessage = async (message, sessionId, company, onToken) => {
+  const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      query: message,
+      company: company,
+      session_id: sessionId,
+    }),
+  });
+
+  if (!response.ok || !response.body) throw new Error("Failed to send message");
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let answer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    const events = buffer.split("\n\n");
+    buffer = events.pop();
+
+    for (const rawEvent of events) {
+      let event = "message";
+      let data = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+
+      if (event === "error") throw new Error(payload.detail);
+      if (event === "done") answer = payload.answer;
+      else {
+        answer += payload.token;
+        onToken?.(payload.token, answer);
+      }
+    }
+  }
+
+  return {
+    id: Date.now().toString(),
+    role: "assistant",
+    content: answer,
+    timestamp: new Date(),
+  };
+};
+
 // Get chat history
 export const getChatHistory = async (company, sessionId) => {
   try {
@@ -13,12 +13,13 @@ import { Textarea } from "./ui/textarea";
 import { ScrollArea } from "./ui/scroll-area";
 import { Avatar, AvatarFallback } from "./ui/avatar";
 import { Send, Bot, User, Sparkles } from "lucide-react";
-import { sendChatMessage, getChatHistory } from "../api/appApi";
+import { streamChatMessage, getChatHistory } from "../api/appApi";
 
 export default function ChatInterface({ selectedCompany }) {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const [sessionId] = useState(() => Math.random().toString(36).substring(7));
   const scrollAreaRef = useRef(null);
   const messagesEndRef = useRef(null);
@@ -48,7 +49,7 @@ export default function ChatInterface({ selectedCompany }) {
 
   const handleSubmit = async (e) => {
     e.preventDefault();
-    if (!input.trim() || isLoading || !selectedCompany) return;
+    if (!input.trim() || isLoading || isStreaming || !selectedCompany) return;
 
     const userMessage = {
       id: Date.now().toString(),
@@ -60,26 +61,37 @@ export default function ChatInterface({ selectedCompany }) {
     setMessages((prev) => [...prev, userMessage]);
     setInput("");
     setIsLoading(true);
+    setIsStreaming(true);
+
+    const assistantId = (Date.now() + 1).toString();
+    const upsertAssistant = (content) =>
+      setMessages((prev) => {
+        const rest = prev.filter((m) => m.id !== assistantId);
+        return [
+          ...rest,
+          { id: assistantId, role: "assistant", content, timestamp: new Date() },
+        ];
+      });
 
     try {
-      const assistantMessage = await sendChatMessage(
+      const assistantMessage = await streamChatMessage(
         input,
         sessionId,
-        selectedCompany
+        selectedCompany,
+        (_token, answerSoFar) => {
+          setIsLoading(false);
+          upsertAssistant(answerSoFar);
+        }
       );
-      setMessages((prev) => [...prev, assistantMessage]);
+      upsertAssistant(assistantMessage.content);
     } catch (error) {
       console.error("Failed to send message:", error);
-      const errorMessage = {
-        id: (Date.now() + 1).toString(),
-        role: "assistant",
-        content:
-          "Sorry, I encountered an error while processing your message. Please try again.",
-        timestamp: new Date(),
-      };
-      setMessages((prev) => [...prev, errorMessage]);
+      upsertAssistant(
+        "Sorry, I encountered an error while processing your message. Please try again."
+      );
     } finally {
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
@@ -266,7 +278,7 @@ export default function ChatInterface({ selectedCompany }) {
                     ? `Ask about ${selectedCompany}...`
                     : "Select a company first..."
                 }
-                disabled={!selectedCompany || isLoading}
+                disabled={!selectedCompany || isLoading || isStreaming}
                 className="min-h-[50px] max-h-[120px] resize-none pr-12 rounded-xl border-2 focus:border-blue-300 transition-colors"
                 onKeyDown={(e) => {
                   if (e.key === "Enter" && !e.shiftKey) {
@@ -277,7 +289,7 @@ export default function ChatInterface({ selectedCompany }) {
               />
               <Button
                 type="submit"
-                disabled={!input.trim() || !selectedCompany || isLoading}
+                disabled={!input.trim() || !selectedCompany || isLoading || isStreaming}
                 size="sm"
                 className="absolute right-2 bottom-2 h-8 w-8 p-0 rounded-lg bg-blue-500 hover:bg-blue-600 disabled:bg-muted"
               >